@@ -1,17 +1,27 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
-import json
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, g
 import os
+import base64
+import hashlib
 import smtplib
 import logging
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from collections import OrderedDict
 from datetime import datetime
 from functools import wraps
 from dotenv import load_dotenv
 from gedcom_parser import GedcomParser
 from relationship_calculator import RelationshipCalculator
 from generation_calculator import GenerationCalculator
+from family_graph import FamilyGraph
+from relatedness_calculator import RelatednessCalculator
+from search_index import SearchIndex
+from stats_calculator import StatsCalculator
+from compact_records import compact_family_data, compact_changed_records, record_to_dict
 from database_setup import db
+from read_write_lock import ReadWriteLock
 
 # Configuration
 DEBUG = os.getenv('FLASK_ENV') != 'production'
@@ -40,9 +50,180 @@ app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this-in-product
 # Initialize the GEDCOM parser
 parser = GedcomParser()
 gedcom_file = os.getenv('GEDCOM_FILE_PATH', 'sample-family.ged')  # Fallback to sample data
-family_data = parser.parse_file(gedcom_file)
-relationship_calc = RelationshipCalculator(family_data)
-generation_calc = GenerationCalculator(family_data['individuals'], family_data['families'])
+gedcom_parse_workers = int(os.getenv('GEDCOM_PARSE_WORKERS', 1))  # >1 parses very large files in a process pool
+family_data = parser.parse_file_cached(gedcom_file, workers=gedcom_parse_workers)  # Reuses the snapshot written by the first worker
+COMPACT_RECORDS = os.getenv('COMPACT_RECORDS', 'false').lower() == 'true'  # Slot-based records use less RAM per worker
+if COMPACT_RECORDS:
+    compact_family_data(family_data)
+family_graph = FamilyGraph(family_data)
+relationship_calc = RelationshipCalculator(family_data, family_graph=family_graph)
+generation_calc = GenerationCalculator(family_data['individuals'], family_data['families'],
+                                       precompute=True, family_graph=family_graph)
+relatedness_calc = RelatednessCalculator(family_data['individuals'], family_graph)
+search_index = SearchIndex(family_data['individuals'])
+stats_calc = StatsCalculator(family_data['individuals'], family_data['families'], generation_calc)
+
+# Default reference person for sessions that haven't picked one: admin setting, then env var, then by name
+DEFAULT_REFERENCE_PERSON_ID = os.getenv('DEFAULT_REFERENCE_PERSON_ID', '')
+DEFAULT_REFERENCE_SETTING = 'default_reference_person_id'
+named_reference_person = None
+default_reference_person = None
+
+def is_main_person(person_id):
+    """Whether a person is named like the main reference person"""
+    for name_info in family_data['individuals'].get(person_id, {}).get('names', []):
+        full_name = f"{name_info.get('given', '')} {name_info.get('surname', '')}".strip()
+        # Look for Rev Emmanuel Adjei in real data
+        if 'Emmanuel' in full_name and 'Adjei' in full_name:
+            return True
+        # Fallback to John Doe for sample data demonstration
+        if 'John' in full_name and 'Doe' in full_name:
+            return True
+    return False
+
+def search_main_person():
+    """Find Rev Emmanuel Adjei as the main reference person (or John Doe in sample data)"""
+    for person_id in family_data['individuals']:
+        if is_main_person(person_id):
+            return person_id
+    
+    # Final fallback to first person if neither found
+    return next(iter(family_data['individuals']), None)
+
+def refresh_default_reference_person(rescan=False, changed_people=()):
+    """Resolve the default reference person; the name scan only runs on a load or when a re-sync could change its result"""
+    global named_reference_person, default_reference_person
+    # A re-sync matters if it changed the person found last time or gave someone else a matching name
+    if (rescan or named_reference_person not in family_data['individuals']
+            or named_reference_person in changed_people
+            or any(is_main_person(person_id) for person_id in changed_people)):
+        named_reference_person = search_main_person()
+    
+    default_reference_person = named_reference_person
+    for person_id in (db.get_setting(DEFAULT_REFERENCE_SETTING), DEFAULT_REFERENCE_PERSON_ID):
+        if person_id and person_id in family_data['individuals']:
+            default_reference_person = person_id
+            break
+    return default_reference_person
+
+refresh_default_reference_person(rescan=True)
+
+# Serialized /person payloads keyed by (person_id, reference_person_id, data version)
+PERSON_CACHE_SIZE = int(os.getenv('PERSON_CACHE_SIZE', 1024))
+person_cache = OrderedDict()
+person_cache_lock = threading.Lock()
+data_version = 1  # Bumped by every GEDCOM re-sync
+
+# Most IDs one /people request may ask for
+PEOPLE_BATCH_LIMIT = int(os.getenv('PEOPLE_BATCH_LIMIT', 500))
+
+# Triage states shown in the admin panel
+TRIAGE_STATUSES = ('pending', 'triaged', 'completed')
+
+# Rows per page in the admin submission and feedback lists
+ADMIN_PAGE_SIZE = int(os.getenv('ADMIN_PAGE_SIZE', 50))
+
+# Most rows one bulk archive/delete/triage request may name
+ADMIN_BULK_LIMIT = int(os.getenv('ADMIN_BULK_LIMIT', 500))
+
+# Deepest chart /tree returns in one response; deeper branches are expanded with cursors
+TREE_MAX_DEPTH = int(os.getenv('TREE_MAX_DEPTH', 8))
+
+# Hot reload of the GEDCOM file: each worker applies changed records on its own
+GEDCOM_CHECK_INTERVAL = int(os.getenv('GEDCOM_CHECK_INTERVAL', 30))  # Seconds; 0 disables the automatic check
+gedcom_lock = threading.Lock()  # One re-sync at a time
+gedcom_stat = os.stat(gedcom_file)
+last_gedcom_check = time.time()
+
+# Requests read the family data and everything derived from it under the read side;
+# a re-sync changes them in place under the write side
+family_data_lock = ReadWriteLock()
+# Endpoints that take the write side themselves
+UNLOCKED_ENDPOINTS = {'admin_reload_gedcom'}
+
+def resync_family_data():
+    """Re-read the GEDCOM file and apply only the records that changed since it was loaded"""
+    global gedcom_stat
+    with gedcom_lock:
+        source_stat = os.stat(gedcom_file)
+        # Reading and diffing the file leaves the loaded data alone, so requests are still served
+        diff = parser.diff_file(gedcom_file)
+        
+        with family_data_lock.write_locked():
+            changes = resync_loaded_data(diff)
+        
+        parser.write_resync_snapshot(gedcom_file)
+        # Recorded only once the re-sync worked, so a failed one (e.g. a half-copied file) is retried
+        gedcom_stat = source_stat
+        
+        logging.info(f"Re-synced {gedcom_file}: {len(changes['individuals'])} individuals, "
+                     f"{len(changes['families'])} families, {len(changes['notes'])} notes changed")
+        return changes
+
+def resync_loaded_data(diff):
+    """Apply a GEDCOM diff to the loaded data and the structures derived from it"""
+    global data_version
+    changes = parser.apply_diff(diff)
+    family_data['record_versions'] = parser.record_versions
+    if COMPACT_RECORDS:
+        compact_changed_records(family_data, changes['individuals'], changes['families'])
+    
+    # Only people whose family links changed need new edges and ancestor maps
+    relinked_people = family_graph.update_people(changes['linked_people'])
+    relatedness_calc.update_people(changes['individuals'], relinked_people)
+    if relinked_people:
+        relationship_calc.kinship_calc.invalidate(relinked_people)
+        relationship_calc.invalidate_lineage(relinked_people)
+        # A new link can change the shortest path, and so the generation and relationship label, of
+        # anyone in the same part of the tree: the table is redone with one BFS and the maps are dropped
+        generation_calc.precompute_generations()
+        relationship_calc.clear_relationship_cache()
+    else:
+        generation_calc.refresh_people(changes['individuals'])
+        relationship_calc.refresh_people(changes['individuals'])
+    search_index.update_people(changes['individuals'])
+    # Note-only edits leave every aggregate as it was
+    if changes['individuals'] or changes['families']:
+        stats_calc.update_people(changes['individuals'], generations_changed=bool(relinked_people))
+    refresh_default_reference_person(changed_people=changes['individuals'])
+    
+    # Cached person responses belong to the previous data version
+    data_version += 1
+    with person_cache_lock:
+        person_cache.clear()
+    return changes
+
+@app.before_request
+def check_for_gedcom_update():
+    """Pick up a GEDCOM file replaced on disk, e.g. after an admin re-sync in another worker"""
+    global last_gedcom_check
+    if not GEDCOM_CHECK_INTERVAL or time.time() - last_gedcom_check < GEDCOM_CHECK_INTERVAL:
+        return
+    last_gedcom_check = time.time()
+    
+    try:
+        current_stat = os.stat(gedcom_file)
+        if (current_stat.st_mtime_ns, current_stat.st_size) != (gedcom_stat.st_mtime_ns, gedcom_stat.st_size):
+            resync_family_data()
+        else:
+            # Picks up a default reference person an admin set through another worker
+            refresh_default_reference_person()
+    except Exception as e:
+        logging.error(f"GEDCOM re-sync error: {str(e)}")
+
+@app.before_request
+def lock_family_data():
+    """Keep a re-sync from changing the family data while this request reads it"""
+    # Registered after check_for_gedcom_update, which may need the write side first
+    if request.endpoint not in UNLOCKED_ENDPOINTS:
+        family_data_lock.acquire_read()
+        g.family_data_locked = True
+
+@app.teardown_request
+def unlock_family_data(exception=None):
+    """Release the read side taken by lock_family_data"""
+    if g.pop('family_data_locked', False):
+        family_data_lock.release_read()
 
 # Reference person is now stored per-user in Flask sessions
 
@@ -95,11 +276,7 @@ def index():
     if not session.get('explore_authenticated'):
         return redirect(url_for('homepage'))
     
-    # Get user's reference person from session, or default
-    user_reference_person = session.get('reference_person_id')
-    if user_reference_person is None:
-        user_reference_person = find_main_person()
-        session['reference_person_id'] = user_reference_person
+    user_reference_person = get_session_reference_person()
     
     # Get current reference person data to display on load
     reference_person = family_data['individuals'].get(user_reference_person, {})
@@ -170,24 +347,28 @@ def admin_dashboard():
 @explore_required
 def search():
     query = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'exact')
     if not query:
         return jsonify([])
     
+    matches = search_index.search(query, limit=20, mode=mode)
+    # Fall back to spelling variants when nothing matches as typed
+    if not matches and mode == 'exact':
+        matches = search_index.search(query, limit=20, mode='fuzzy')
+    
+    # Summaries are only generated for the results we return
     results = []
-    for person_id, person in family_data['individuals'].items():
-        names = person.get('names', [])
-        for name_info in names:
-            full_name = f"{name_info.get('given', '')} {name_info.get('surname', '')}".strip()
-            if query.lower() in full_name.lower():
-                results.append({
-                    'id': person_id,
-                    'name': full_name,
-                    'birth_year': person.get('birth_year'),
-                    'death_year': person.get('death_year'),
-                    'summary': generate_person_summary(person_id)
-                })
-    
-    return jsonify(results[:20])  # Limit to 20 results
+    for person_id, full_name in matches:
+        person = family_data['individuals'][person_id]
+        results.append({
+            'id': person_id,
+            'name': full_name,
+            'birth_year': person.get('birth_year'),
+            'death_year': person.get('death_year'),
+            'summary': generate_person_summary(person_id)
+        })
+    
+    return jsonify(results)
 
 @app.route('/person/<person_id>')
 @explore_required
@@ -195,44 +376,226 @@ def get_person(person_id):
     if person_id not in family_data['individuals']:
         return jsonify({'error': 'Person not found'}), 404
     
-    # Get user's reference person from session, or default
-    user_reference_person = session.get('reference_person_id')
-    if user_reference_person is None:
-        user_reference_person = find_main_person()
-        session['reference_person_id'] = user_reference_person
+    user_reference_person = get_session_reference_person()
     
-    person = family_data['individuals'][person_id]
+    cache_key = (person_id, user_reference_person, DATABASE_VERSION, data_version)
+    with person_cache_lock:
+        cached = person_cache.get(cache_key)
+        if cached is not None:
+            person_cache.move_to_end(cache_key)
+    
+    if cached is None:
+        person = family_data['individuals'][person_id]
+        
+        # Look up the relationship in the cached map for the user's reference person
+        relationship = relationship_calc.get_relationship(user_reference_person, person_id)
+        
+        # Calculate generation
+        generation_label = generation_calc.get_generation_label(person_id)
+        
+        payload = app.json.dumps({
+            'person': record_to_dict(person),
+            'relationship': relationship,
+            'summary': generate_person_summary(person_id),
+            'family_connections': get_family_connections(person_id),
+            'notes': person.get('notes', []),
+            'generation': generation_label,
+            'shared_dna_percent': relatedness_calc.get_shared_dna_percent(user_reference_person, person_id)
+        }).encode('utf-8')
+        cached = (payload, hashlib.sha256(payload).hexdigest())
+        
+        with person_cache_lock:
+            person_cache[cache_key] = cached
+            person_cache.move_to_end(cache_key)
+            while len(person_cache) > PERSON_CACHE_SIZE:
+                person_cache.popitem(last=False)
+    
+    # Strong ETag over the exact bytes, so a repeat view gets an empty 304
+    payload, etag = cached
+    response = app.response_class(payload, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response.make_conditional(request)
+
+@app.route('/relationships')
+@explore_required
+def get_relationships():
+    """Get the relationship of every person to the user's reference person"""
+    user_reference_person = get_session_reference_person()
+    
+    return jsonify({
+        'reference_person_id': user_reference_person,
+        'relationships': relationship_calc.get_relationships_from(user_reference_person)
+    })
+
+@app.route('/people', methods=['GET', 'POST'])
+@explore_required
+def get_people():
+    """Get summaries, generations and relationships of many people in one request"""
+    # IDs come as ?ids=I1,I2 or as a JSON body {"ids": [...]}
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        person_ids = data.get('ids', [])
+    else:
+        person_ids = [person_id for person_id in request.args.get('ids', '').split(',') if person_id]
+    
+    if not isinstance(person_ids, list) or not all(isinstance(person_id, str) for person_id in person_ids):
+        return jsonify({'error': 'ids must be a list of person IDs'}), 400
+    if len(person_ids) > PEOPLE_BATCH_LIMIT:
+        return jsonify({'error': f'At most {PEOPLE_BATCH_LIMIT} IDs per request'}), 400
+    
+    user_reference_person = get_session_reference_person()
+    
+    # One relationship map serves the whole batch
+    relationships = relationship_calc.get_relationships_from(user_reference_person)
+    
+    people = {}
+    not_found = []
+    for person_id in dict.fromkeys(person_ids):
+        if person_id not in family_data['individuals']:
+            not_found.append(person_id)
+            continue
+        people[person_id] = {
+            'name': get_person_name(person_id),
+            'summary': generate_person_summary(person_id),
+            'generation': generation_calc.get_generation_label(person_id),
+            'relationship': relationships.get(person_id, 'Unknown relationship')
+        }
+    
+    return jsonify({
+        'reference_person_id': user_reference_person,
+        'people': people,
+        'not_found': not_found
+    })
+
+@app.route('/relatedness')
+@explore_required
+def get_relatedness():
+    """Get the expected percentage of shared DNA between the user's reference person and everyone related"""
+    user_reference_person = get_session_reference_person()
+    
+    person_id = request.args.get('person_id')
+    if person_id:
+        if person_id not in family_data['individuals']:
+            return jsonify({'error': 'Person not found'}), 404
+        return jsonify({
+            'reference_person_id': user_reference_person,
+            'person_id': person_id,
+            'shared_dna_percent': relatedness_calc.get_shared_dna_percent(user_reference_person, person_id)
+        })
+    
+    # People missing from the map share no expected DNA with the reference person
+    return jsonify({
+        'reference_person_id': user_reference_person,
+        'relatedness': relatedness_calc.get_relatedness(user_reference_person)
+    })
+
+@app.route('/tree/<person_id>')
+@explore_required
+def get_tree(person_id):
+    """Get a nested pedigree or descendant chart down to a depth, with cursors on collapsed branches"""
+    if person_id not in family_data['individuals']:
+        return jsonify({'error': 'Person not found'}), 404
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        # A cursor repeats the direction and depth of the chart it came from
+        decoded = decode_tree_cursor(cursor)
+        if decoded is None or decoded[2] != person_id:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        direction, depth, _ = decoded
+    else:
+        direction = request.args.get('direction', 'ancestors')
+        try:
+            depth = int(request.args.get('depth', 3))
+        except ValueError:
+            return jsonify({'error': 'Depth must be a number'}), 400
     
-    # Calculate relationship to the user's reference person
-    relationship = relationship_calc.calculate_relationship(user_reference_person, person_id)
+    if direction not in ('ancestors', 'descendants'):
+        return jsonify({'error': 'Direction must be ancestors or descendants'}), 400
+    depth = max(1, min(depth, TREE_MAX_DEPTH))
     
-    # Calculate generation
-    generation_label = generation_calc.get_generation_label(person_id)
+    user_reference_person = get_session_reference_person()
+    
+    if direction == 'ancestors':
+        relatives = relationship_calc.get_ancestor_depths(person_id, depth)
+    else:
+        relatives = relationship_calc.get_descendant_depths(person_id, depth)
+    
+    # Each person's details appear once; the nested tree only carries IDs
+    relationships = relationship_calc.get_relationships_from(user_reference_person)
+    people = {}
+    for relative_id in [person_id] + list(relatives):
+        if relative_id in family_data['individuals']:
+            people[relative_id] = get_tree_person(relative_id, relationships)
     
     return jsonify({
-        'person': person,
-        'relationship': relationship,
-        'summary': generate_person_summary(person_id),
+        'reference_person_id': user_reference_person,
+        'direction': direction,
+        'depth': depth,
         'family_connections': get_family_connections(person_id),
-        'notes': person.get('notes', []),
-        'generation': generation_label
+        'people': people,
+        'tree': build_tree_node(person_id, direction, depth, 0, set())
     })
 
-def find_main_person():
-    """Find Rev Emmanuel Adjei as the main reference person (or John Doe in sample data)"""
-    for person_id, person in family_data['individuals'].items():
-        names = person.get('names', [])
-        for name_info in names:
-            full_name = f"{name_info.get('given', '')} {name_info.get('surname', '')}".strip()
-            # Look for Rev Emmanuel Adjei in real data
-            if 'Emmanuel' in full_name and 'Adjei' in full_name:
-                return person_id
-            # Fallback to John Doe for sample data demonstration
-            if 'John' in full_name and 'Doe' in full_name:
-                return person_id
+def get_tree_person(person_id, relationships):
+    """Compact details of one person in a chart"""
+    person = family_data['individuals'][person_id]
+    return {
+        'name': get_person_name(person_id),
+        'sex': person.get('sex'),
+        'birth_year': person.get('birth_year'),
+        'death_year': person.get('death_year'),
+        'generation': generation_calc.get_generation_label(person_id),
+        'relationship': relationships.get(person_id, 'Unknown relationship')
+    }
+
+def build_tree_node(person_id, direction, depth, level, expanded):
+    """Nest parents (or children) of a chart node; people reached twice through cousin marriages are only referenced"""
+    node = {'id': person_id}
+    if person_id in expanded:
+        node['repeat'] = True
+        return node
+    expanded.add(person_id)
     
-    # Final fallback to first person if neither found
-    return list(family_data['individuals'].keys())[0] if family_data['individuals'] else None
+    if direction == 'ancestors':
+        branch_key, relative_ids = 'parents', family_graph.get_parents(person_id)
+    else:
+        branch_key, relative_ids = 'children', family_graph.get_children(person_id)
+    
+    if relative_ids:
+        if level == depth:
+            node['cursor'] = encode_tree_cursor(direction, depth, person_id)
+        else:
+            node[branch_key] = [build_tree_node(relative_id, direction, depth, level + 1, expanded)
+                                for relative_id in relative_ids]
+    return node
+
+def encode_tree_cursor(direction, depth, person_id):
+    """Opaque token for expanding a collapsed chart branch with /tree/<person_id>?cursor=..."""
+    return base64.urlsafe_b64encode(f"{direction}:{depth}:{person_id}".encode('utf-8')).decode('ascii')
+
+def decode_tree_cursor(cursor):
+    """Decode a chart cursor into (direction, depth, person_id), or None if it is malformed"""
+    try:
+        direction, depth, person_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split(':', 2)
+        return direction, int(depth), person_id
+    except (ValueError, UnicodeError):
+        return None
+
+def find_main_person():
+    """Default reference person, resolved once per data load"""
+    return default_reference_person
+
+def get_session_reference_person():
+    """Get user's reference person from session, or default"""
+    user_reference_person = session.get('reference_person_id')
+    if user_reference_person is None:
+        user_reference_person = find_main_person()
+        session['reference_person_id'] = user_reference_person
+    return user_reference_person
 
 def generate_person_summary(person_id):
     """Generate a brief summary of a person"""
@@ -268,51 +631,14 @@ def generate_person_summary(person_id):
 
 def get_family_connections(person_id):
     """Get immediate family connections for a person"""
-    person = family_data['individuals'].get(person_id, {})
-    connections = {
-        'parents': [],
-        'spouses': [],
-        'children': []
+    return {
+        'parents': [{'id': parent_id, 'name': get_person_name(parent_id)}
+                    for parent_id in family_graph.get_parents(person_id)],
+        'spouses': [{'id': spouse_id, 'name': get_person_name(spouse_id)}
+                    for spouse_id in family_graph.get_spouses(person_id)],
+        'children': [{'id': child_id, 'name': get_person_name(child_id)}
+                     for child_id in family_graph.get_children(person_id)]
     }
-    
-    # Find parents through family relationships
-    for family_id in person.get('child_of_families', []):
-        family = family_data['families'].get(family_id, {})
-        if family.get('husband'):
-            connections['parents'].append({
-                'id': family['husband'],
-                'name': get_person_name(family['husband'])
-            })
-        if family.get('wife'):
-            connections['parents'].append({
-                'id': family['wife'],
-                'name': get_person_name(family['wife'])
-            })
-    
-    # Find spouses and children through families where this person is a parent
-    for family_id in person.get('spouse_in_families', []):
-        family = family_data['families'].get(family_id, {})
-        
-        # Add spouse
-        if family.get('husband') == person_id and family.get('wife'):
-            connections['spouses'].append({
-                'id': family['wife'],
-                'name': get_person_name(family['wife'])
-            })
-        elif family.get('wife') == person_id and family.get('husband'):
-            connections['spouses'].append({
-                'id': family['husband'],
-                'name': get_person_name(family['husband'])
-            })
-        
-        # Add children
-        for child_id in family.get('children', []):
-            connections['children'].append({
-                'id': child_id,
-                'name': get_person_name(child_id)
-            })
-    
-    return connections
 
 def get_person_name(person_id):
     """Get the primary name of a person"""
@@ -326,15 +652,14 @@ def get_person_name(person_id):
 @app.route('/stats')
 def get_stats():
     """Get database statistics"""
-    return jsonify({
-        'total_individuals': len(family_data['individuals']),
-        'total_families': len(family_data['families']),
-        'date_range': get_date_range(),
-        'most_common_surnames': get_common_surnames(),
+    # Aggregates are precomputed when the tree loads and refreshed on re-sync
+    stats = dict(stats_calc.stats)
+    stats.update({
         'app_version': APP_VERSION,
         'database_version': DATABASE_VERSION,
         'last_updated': LAST_UPDATED
     })
+    return jsonify(stats)
 
 @app.route('/version')
 def get_version():
@@ -347,32 +672,6 @@ def get_version():
         'total_families': len(family_data['families'])
     })
 
-def get_date_range():
-    """Get the date range of the family tree"""
-    birth_years = []
-    for person in family_data['individuals'].values():
-        if person.get('birth_year'):
-            birth_years.append(person['birth_year'])
-    
-    if birth_years:
-        return {
-            'earliest': min(birth_years),
-            'latest': max(birth_years)
-        }
-    return None
-
-def get_common_surnames():
-    """Get the most common surnames in the database"""
-    surname_count = {}
-    for person in family_data['individuals'].values():
-        for name_info in person.get('names', []):
-            surname = name_info.get('surname', '').strip()
-            if surname:
-                surname_count[surname] = surname_count.get(surname, 0) + 1
-    
-    # Return top 10 surnames
-    return sorted(surname_count.items(), key=lambda x: x[1], reverse=True)[:10]
-
 @app.route('/set_reference_person/<person_id>')
 def set_reference_person(person_id):
     """Set a new reference person for relationship calculations (per user session)"""
@@ -398,11 +697,7 @@ def set_reference_person(person_id):
 @app.route('/get_reference_person')
 def get_reference_person():
     """Get current reference person information (per user session)"""
-    # Get user's reference person from session, or default
-    user_reference_person = session.get('reference_person_id')
-    if user_reference_person is None:
-        user_reference_person = find_main_person()
-        session['reference_person_id'] = user_reference_person
+    user_reference_person = get_session_reference_person()
     
     person = family_data['individuals'].get(user_reference_person, {})
     reference_name = "Unknown"
@@ -524,9 +819,8 @@ def submit_feedback():
 def export_submissions():
     """Export submissions in CSV format and GEDCOM-compatible format"""
     try:
-        submissions = load_submissions()
-        # Only export non-archived submissions  
-        active_submissions = [s for s in submissions if not s.get('archived', False)]
+        # Only export non-archived submissions
+        active_submissions, _ = db.query_submissions(archived=False, limit=None)
         gedcom_export = generate_gedcom_export(active_submissions)
         csv_data = db.export_submissions_csv()
         
@@ -545,9 +839,8 @@ def export_submissions():
 def export_feedback():
     """Export all feedback for review"""
     try:
-        feedback_list = load_feedback()
         # Only return non-archived feedback
-        active_feedback = [f for f in feedback_list if not f.get('archived', False)]
+        active_feedback, _ = db.query_feedback(archived=False, limit=None)
         csv_data = db.export_feedback_csv()
         
         return jsonify({
@@ -560,81 +853,45 @@ def export_feedback():
         logging.error(f"Export feedback error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 400
 
-@app.route('/archive_submission/<int:submission_index>', methods=['POST'])
+@app.route('/archive_submission/<int:submission_id>', methods=['POST'])
 @admin_required
-def archive_submission(submission_index):
+def archive_submission(submission_id):
     """Archive a specific submission"""
     try:
-        submissions = load_submissions()
-        if submission_index < 0 or submission_index >= len(submissions):
-            return jsonify({'success': False, 'error': 'Invalid submission index'}), 400
-        
-        submission = submissions[submission_index]
-        submission_id = submission.get('id')
+        archived = db.archive_submissions([submission_id], session.get('admin_name', 'admin'))
+        if not archived:
+            return jsonify({'success': False, 'error': 'Submission not found or already archived'}), 404
         
-        if not submission_id:
-            return jsonify({'success': False, 'error': 'Submission ID not found'}), 400
-        
-        # Update in database
-        updates = {
-            'archived': True,
-            'archived_at': datetime.now().isoformat(),
-            'archived_by': session.get('admin_name', 'admin')
-        }
-        
-        success = db.update_submission(submission_id, updates)
+        # Log the archiving action
+        log_admin_action('archive_submission', {
+            'submission_id': submission_id,
+            'submission_type': archived[0].get('type'),
+            'submitter': archived[0].get('submitter_name')
+        })
         
-        if success:
-            # Log the archiving action
-            log_admin_action('archive_submission', {
-                'submission_id': submission_id,
-                'submission_type': submission.get('type'),
-                'submitter': submission.get('submitter_name')
-            })
-            
-            return jsonify({'success': True, 'message': 'Submission archived successfully'})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to archive submission'}), 400
+        return jsonify({'success': True, 'message': 'Submission archived successfully'})
         
     except Exception as e:
         logging.error(f"Archive submission error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 400
 
-@app.route('/archive_feedback/<int:feedback_index>', methods=['POST'])
+@app.route('/archive_feedback/<int:feedback_id>', methods=['POST'])
 @admin_required
-def archive_feedback(feedback_index):
+def archive_feedback(feedback_id):
     """Archive a specific feedback item"""
     try:
-        feedback_list = load_feedback()
-        if feedback_index < 0 or feedback_index >= len(feedback_list):
-            return jsonify({'success': False, 'error': 'Invalid feedback index'}), 400
-        
-        feedback = feedback_list[feedback_index]
-        feedback_id = feedback.get('id')
-        
-        if not feedback_id:
-            return jsonify({'success': False, 'error': 'Feedback ID not found'}), 400
-        
-        # Update in database
-        updates = {
-            'archived': True,
-            'archived_at': datetime.now().isoformat(),
-            'archived_by': session.get('admin_name', 'admin')
-        }
+        archived = db.archive_feedback([feedback_id], session.get('admin_name', 'admin'))
+        if not archived:
+            return jsonify({'success': False, 'error': 'Feedback not found or already archived'}), 404
         
-        success = db.update_feedback(feedback_id, updates)
+        # Log the archiving action
+        log_admin_action('archive_feedback', {
+            'feedback_id': feedback_id,
+            'feedback_type': archived[0].get('feedback_type'),
+            'submitter': archived[0].get('submitter_name')
+        })
         
-        if success:
-            # Log the archiving action
-            log_admin_action('archive_feedback', {
-                'feedback_id': feedback_id,
-                'feedback_type': feedback.get('feedback_type'),
-                'submitter': feedback.get('submitter_name')
-            })
-            
-            return jsonify({'success': True, 'message': 'Feedback archived successfully'})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to archive feedback'}), 400
+        return jsonify({'success': True, 'message': 'Feedback archived successfully'})
             
     except Exception as e:
         logging.error(f"Archive feedback error: {str(e)}")
@@ -645,11 +902,8 @@ def archive_feedback(feedback_index):
 def view_archived():
     """View all archived submissions and feedback"""
     try:
-        submissions = load_submissions()
-        feedback_list = load_feedback()
-        
-        archived_submissions = [s for s in submissions if s.get('archived', False)]
-        archived_feedback = [f for f in feedback_list if f.get('archived', False)]
+        archived_submissions, _ = db.query_submissions(archived=True, limit=None)
+        archived_feedback, _ = db.query_feedback(archived=True, limit=None)
         
         return jsonify({
             'success': True,
@@ -661,94 +915,249 @@ def view_archived():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
-@app.route('/delete_archived_submission/<int:submission_index>', methods=['DELETE'])
+def get_page_args():
+    """Cursor and page size of a paginated admin request"""
+    try:
+        limit = int(request.args.get('limit', ADMIN_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be a number')
+    return request.args.get('cursor') or None, limit
+
+def get_admin_list_args():
+    """Filters, cursor and page size shared by the paginated admin list endpoints"""
+    archived = request.args.get('archived', 'false').lower()
+    if archived not in ('true', 'false', 'all'):
+        raise ValueError('archived must be true, false or all')
+    cursor, limit = get_page_args()
+    return {
+        'archived': None if archived == 'all' else archived == 'true',
+        'triage_status': request.args.get('triage_status') or None,
+        'date_from': request.args.get('date_from') or None,
+        'date_to': request.args.get('date_to') or None
+    }, cursor, limit
+
+@app.route('/admin/submissions')
+@admin_required
+def admin_submissions():
+    """One page of submissions, newest first, filtered by archived/type/triage_status/person_id/date range"""
+    try:
+        filters, cursor, limit = get_admin_list_args()
+        filters['submission_type'] = request.args.get('type') or None
+        filters['person_id'] = request.args.get('person_id') or None
+        submissions, next_cursor = db.query_submissions(cursor=cursor, limit=limit, **filters)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Admin submissions error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = {
+        'success': True,
+        'submissions': submissions,
+        'next_cursor': next_cursor
+    }
+    # The total only matters for the first page
+    if not cursor:
+        response['count'] = db.count_submissions(**filters)
+    return jsonify(response)
+
+@app.route('/admin/feedback')
+@admin_required
+def admin_feedback():
+    """One page of feedback, newest first, filtered by archived/type/triage_status/date range"""
+    try:
+        filters, cursor, limit = get_admin_list_args()
+        filters['feedback_type'] = request.args.get('type') or None
+        feedback_list, next_cursor = db.query_feedback(cursor=cursor, limit=limit, **filters)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Admin feedback error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = {
+        'success': True,
+        'feedback': feedback_list,
+        'next_cursor': next_cursor
+    }
+    # The total only matters for the first page
+    if not cursor:
+        response['count'] = db.count_feedback(**filters)
+    return jsonify(response)
+
+@app.route('/delete_archived_submission/<int:submission_id>', methods=['DELETE'])
 @admin_required
-def delete_archived_submission(submission_index):
+def delete_archived_submission(submission_id):
     """Permanently delete an archived submission"""
     try:
-        submissions = load_submissions()
-        if submission_index < 0 or submission_index >= len(submissions):
-            return jsonify({'success': False, 'error': 'Invalid submission index'}), 400
-        
-        submission = submissions[submission_index]
-        submission_id = submission.get('id')
-        
-        if not submission_id:
-            return jsonify({'success': False, 'error': 'Submission ID not found'}), 400
-            
-        if not submission.get('archived', False):
-            return jsonify({'success': False, 'error': 'Submission must be archived before deletion'}), 400
+        deleted = db.delete_archived_submissions([submission_id])
+        if not deleted:
+            return jsonify({'success': False, 'error': 'Archived submission not found'}), 404
         
-        # Log the deletion action before removing
+        # Keep the deleted row in the audit log
         log_admin_action('delete_archived_submission', {
             'submission_id': submission_id,
-            'submission_data': submission,
+            'submission_data': deleted[0],
             'deleted_at': datetime.now().isoformat()
         })
         
-        # Delete from database
-        success = db.delete_submission(submission_id)
-        
-        if success:
-            return jsonify({'success': True, 'message': 'Archived submission deleted permanently'})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to delete submission'}), 400
+        return jsonify({'success': True, 'message': 'Archived submission deleted permanently'})
             
     except Exception as e:
         logging.error(f"Delete submission error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 400
 
-@app.route('/delete_archived_feedback/<int:feedback_index>', methods=['DELETE'])
+@app.route('/delete_archived_feedback/<int:feedback_id>', methods=['DELETE'])
 @admin_required
-def delete_archived_feedback(feedback_index):
+def delete_archived_feedback(feedback_id):
     """Permanently delete an archived feedback item"""
     try:
-        feedback_list = load_feedback()
-        if feedback_index < 0 or feedback_index >= len(feedback_list):
-            return jsonify({'success': False, 'error': 'Invalid feedback index'}), 400
-        
-        feedback = feedback_list[feedback_index]
-        feedback_id = feedback.get('id')
+        deleted = db.delete_archived_feedback([feedback_id])
+        if not deleted:
+            return jsonify({'success': False, 'error': 'Archived feedback not found'}), 404
         
-        if not feedback_id:
-            return jsonify({'success': False, 'error': 'Feedback ID not found'}), 400
-            
-        if not feedback.get('archived', False):
-            return jsonify({'success': False, 'error': 'Feedback must be archived before deletion'}), 400
-        
-        # Log the deletion action before removing
+        # Keep the deleted row in the audit log
         log_admin_action('delete_archived_feedback', {
             'feedback_id': feedback_id,
-            'feedback_data': feedback,
+            'feedback_data': deleted[0],
             'deleted_at': datetime.now().isoformat()
         })
         
-        # Delete from database
-        success = db.delete_feedback(feedback_id)
-        
-        if success:
-            return jsonify({'success': True, 'message': 'Archived feedback deleted permanently'})
-        else:
-            return jsonify({'success': False, 'error': 'Failed to delete feedback'}), 400
+        return jsonify({'success': True, 'message': 'Archived feedback deleted permanently'})
             
     except Exception as e:
         logging.error(f"Delete feedback error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 400
 
+def get_bulk_ids():
+    """Row IDs from a bulk request body ({"ids": [...]})"""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise ValueError('ids must be a non-empty list')
+    if len(ids) > ADMIN_BULK_LIMIT:
+        raise ValueError(f'At most {ADMIN_BULK_LIMIT} IDs per request')
+    try:
+        return [int(row_id) for row_id in ids]
+    except (TypeError, ValueError):
+        raise ValueError('ids must be integers')
+
+def bulk_result(requested_ids, done_ids, key):
+    """Response body for a bulk operation, listing the IDs it skipped"""
+    done = set(done_ids)
+    return {
+        'success': True,
+        key: done_ids,
+        'skipped_ids': [row_id for row_id in dict.fromkeys(requested_ids) if row_id not in done],
+        'count': len(done_ids)
+    }
+
+@app.route('/admin/submissions/archive', methods=['POST'])
+@admin_required
+def bulk_archive_submissions():
+    """Archive many submissions in one transaction"""
+    try:
+        submission_ids = get_bulk_ids()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        archived = db.archive_submissions(submission_ids, session.get('admin_name', 'admin'))
+        if archived:
+            log_admin_action('bulk_archive_submissions', {
+                'submission_ids': [submission['id'] for submission in archived]
+            })
+        return jsonify(bulk_result(submission_ids, [row['id'] for row in archived], 'archived_ids'))
+    except Exception as e:
+        logging.error(f"Bulk archive submissions error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/admin/feedback/archive', methods=['POST'])
+@admin_required
+def bulk_archive_feedback():
+    """Archive many feedback items in one transaction"""
+    try:
+        feedback_ids = get_bulk_ids()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        archived = db.archive_feedback(feedback_ids, session.get('admin_name', 'admin'))
+        if archived:
+            log_admin_action('bulk_archive_feedback', {
+                'feedback_ids': [feedback['id'] for feedback in archived]
+            })
+        return jsonify(bulk_result(feedback_ids, [row['id'] for row in archived], 'archived_ids'))
+    except Exception as e:
+        logging.error(f"Bulk archive feedback error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/admin/submissions/delete', methods=['POST'])
+@admin_required
+def bulk_delete_archived_submissions():
+    """Permanently delete many archived submissions in one transaction"""
+    try:
+        submission_ids = get_bulk_ids()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        deleted = db.delete_archived_submissions(submission_ids)
+        if deleted:
+            # Keep the deleted rows in the audit log
+            log_admin_action('bulk_delete_archived_submissions', {
+                'submission_ids': [submission['id'] for submission in deleted],
+                'submission_data': deleted,
+                'deleted_at': datetime.now().isoformat()
+            })
+        return jsonify(bulk_result(submission_ids, [row['id'] for row in deleted], 'deleted_ids'))
+    except Exception as e:
+        logging.error(f"Bulk delete submissions error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/admin/feedback/delete', methods=['POST'])
+@admin_required
+def bulk_delete_archived_feedback():
+    """Permanently delete many archived feedback items in one transaction"""
+    try:
+        feedback_ids = get_bulk_ids()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        deleted = db.delete_archived_feedback(feedback_ids)
+        if deleted:
+            # Keep the deleted rows in the audit log
+            log_admin_action('bulk_delete_archived_feedback', {
+                'feedback_ids': [feedback['id'] for feedback in deleted],
+                'feedback_data': deleted,
+                'deleted_at': datetime.now().isoformat()
+            })
+        return jsonify(bulk_result(feedback_ids, [row['id'] for row in deleted], 'deleted_ids'))
+    except Exception as e:
+        logging.error(f"Bulk delete feedback error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/admin_audit_log')
 @admin_required
 def admin_audit_log():
-    """View admin audit log"""
+    """View one page of the admin audit log, newest first, filtered by action_type/date range"""
     try:
-        audit_log = load_audit_log()
-        
-        return jsonify({
-            'success': True,
-            'audit_log': audit_log,
-            'count': len(audit_log)
-        })
+        cursor, limit = get_page_args()
+        filters = {
+            'action_type': request.args.get('action_type') or None,
+            'date_from': request.args.get('date_from') or None,
+            'date_to': request.args.get('date_to') or None
+        }
+        audit_log, next_cursor = db.query_audit_log(cursor=cursor, limit=limit, **filters)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = {
+        'success': True,
+        'audit_log': audit_log,
+        'next_cursor': next_cursor
+    }
+    # The total only matters for the first page
+    if not cursor:
+        response['count'] = db.count_audit_log(**filters)
+    return jsonify(response)
 
 @app.route('/admin/profile', methods=['GET', 'POST'])
 @admin_required
@@ -808,6 +1217,86 @@ def admin_set_reference_person(person_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@app.route('/admin/default_reference_person', methods=['GET', 'POST'])
+@admin_required
+def admin_default_reference_person():
+    """Get or set the reference person used by sessions that haven't picked one"""
+    if request.method == 'POST':
+        try:
+            data = request.get_json() or {}
+            person_id = (data.get('person_id') or '').strip()
+            if person_id and person_id not in family_data['individuals']:
+                return jsonify({'success': False, 'error': 'Invalid person ID'}), 400
+            
+            # An empty person ID clears the setting and falls back to the env var or name search
+            db.set_setting(DEFAULT_REFERENCE_SETTING, person_id or None)
+            refresh_default_reference_person()
+            
+            log_admin_action('change_default_reference_person', {
+                'person_id': person_id,
+                'person_name': get_person_name(person_id) if person_id else ''
+            })
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'reference_person_id': default_reference_person,
+        'reference_person_name': get_person_name(default_reference_person)
+    })
+
+@app.route('/admin/reload_gedcom', methods=['POST'])
+@admin_required
+def admin_reload_gedcom():
+    """Apply changes from a new export of the GEDCOM file without restarting the app"""
+    try:
+        changes = resync_family_data()
+        summary = {
+            'individuals_changed': len(changes['individuals']),
+            'families_changed': len(changes['families']),
+            'notes_changed': len(changes['notes'])
+        }
+        
+        # Log the reload action
+        log_admin_action('reload_gedcom', dict(summary, gedcom_file=gedcom_file))
+        
+        return jsonify({
+            'success': True,
+            'message': 'GEDCOM data reloaded successfully',
+            'changes': summary,
+            'total_individuals': len(family_data['individuals']),
+            'total_families': len(family_data['families'])
+        })
+    except Exception as e:
+        logging.error(f"Reload GEDCOM error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+def get_triage_updates(data):
+    """Column updates for the triage fields present in an admin request"""
+    updates = {}
+    
+    # Update triage status
+    if 'triage_status' in data:
+        if data['triage_status'] not in TRIAGE_STATUSES:
+            raise ValueError(f"triage_status must be one of: {', '.join(TRIAGE_STATUSES)}")
+        updates['triage_status'] = data['triage_status']
+    
+    # Update notes
+    if 'notes' in data:
+        updates['notes'] = data['notes']
+    
+    # Update reference person
+    if 'reference_person_id' in data:
+        person_id = data['reference_person_id']
+        if person_id and person_id in family_data['individuals']:
+            updates['reference_person_id'] = person_id
+            updates['reference_person_name'] = get_person_name(person_id)
+        elif person_id == '':  # Allow clearing reference person
+            updates['reference_person_id'] = ''
+            updates['reference_person_name'] = ''
+    
+    return updates
+
 @app.route('/update_submission_admin', methods=['POST'])
 @admin_required
 def update_submission_admin():
@@ -819,26 +1308,7 @@ def update_submission_admin():
         if not submission_id:
             return jsonify({'success': False, 'error': 'Submission ID required'}), 400
         
-        updates = {}
-        
-        # Update triage status
-        if 'triage_status' in data:
-            updates['triage_status'] = data['triage_status']
-        
-        # Update notes
-        if 'notes' in data:
-            updates['notes'] = data['notes']
-        
-        # Update reference person
-        if 'reference_person_id' in data:
-            person_id = data['reference_person_id']
-            if person_id and person_id in family_data['individuals']:
-                updates['reference_person_id'] = person_id
-                updates['reference_person_name'] = get_person_name(person_id)
-            elif person_id == '':  # Allow clearing reference person
-                updates['reference_person_id'] = ''
-                updates['reference_person_name'] = ''
-        
+        updates = get_triage_updates(data)
         if not updates:
             return jsonify({'success': False, 'error': 'No valid updates provided'}), 400
         
@@ -872,26 +1342,7 @@ def update_feedback_admin():
         if not feedback_id:
             return jsonify({'success': False, 'error': 'Feedback ID required'}), 400
         
-        updates = {}
-        
-        # Update triage status
-        if 'triage_status' in data:
-            updates['triage_status'] = data['triage_status']
-        
-        # Update notes
-        if 'notes' in data:
-            updates['notes'] = data['notes']
-        
-        # Update reference person
-        if 'reference_person_id' in data:
-            person_id = data['reference_person_id']
-            if person_id and person_id in family_data['individuals']:
-                updates['reference_person_id'] = person_id
-                updates['reference_person_name'] = get_person_name(person_id)
-            elif person_id == '':  # Allow clearing reference person
-                updates['reference_person_id'] = ''
-                updates['reference_person_name'] = ''
-        
+        updates = get_triage_updates(data)
         if not updates:
             return jsonify({'success': False, 'error': 'No valid updates provided'}), 400
         
@@ -914,6 +1365,73 @@ def update_feedback_admin():
         logging.error(f"Update feedback admin error: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 400
 
+def get_bulk_triage_updates():
+    """{row_id: updates} from a bulk triage body ({"updates": [{"id": ..., "triage_status": ...}, ...]})"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('updates')
+    if not isinstance(items, list) or not items:
+        raise ValueError('updates must be a non-empty list')
+    if len(items) > ADMIN_BULK_LIMIT:
+        raise ValueError(f'At most {ADMIN_BULK_LIMIT} updates per request')
+    
+    updates_by_id = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('Each update must be an object')
+        try:
+            row_id = int(item.get('id'))
+        except (TypeError, ValueError):
+            raise ValueError('Each update needs an integer id')
+        updates = get_triage_updates(item)
+        if not updates:
+            raise ValueError(f'No valid updates provided for id {row_id}')
+        updates_by_id[row_id] = updates
+    return updates_by_id
+
+@app.route('/admin/submissions/triage', methods=['POST'])
+@admin_required
+def bulk_triage_submissions():
+    """Update triage status, notes and reference person of many submissions in one transaction"""
+    try:
+        updates_by_id = get_bulk_triage_updates()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        updated_ids = db.bulk_update_submissions(updates_by_id)
+        # Same audit entries as one /update_submission_admin call per row, written together
+        admin_name = session.get('admin_name', 'admin')
+        log_admin_actions([('update_submission_admin', {
+            'submission_id': submission_id,
+            'updates': updates_by_id[submission_id],
+            'admin_name': admin_name
+        }) for submission_id in updated_ids])
+        return jsonify(bulk_result(list(updates_by_id), updated_ids, 'updated_ids'))
+    except Exception as e:
+        logging.error(f"Bulk triage submissions error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/admin/feedback/triage', methods=['POST'])
+@admin_required
+def bulk_triage_feedback():
+    """Update triage status, notes and reference person of many feedback items in one transaction"""
+    try:
+        updates_by_id = get_bulk_triage_updates()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        updated_ids = db.bulk_update_feedback(updates_by_id)
+        # Same audit entries as one /update_feedback_admin call per row, written together
+        admin_name = session.get('admin_name', 'admin')
+        log_admin_actions([('update_feedback_admin', {
+            'feedback_id': feedback_id,
+            'updates': updates_by_id[feedback_id],
+            'admin_name': admin_name
+        }) for feedback_id in updated_ids])
+        return jsonify(bulk_result(list(updates_by_id), updated_ids, 'updated_ids'))
+    except Exception as e:
+        logging.error(f"Bulk triage feedback error: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @app.route('/search_person_for_admin', methods=['GET'])
 @admin_required
 def search_person_for_admin():
@@ -924,33 +1442,20 @@ def search_person_for_admin():
         if len(query) < 2:
             return jsonify({'success': False, 'error': 'Query too short'}), 400
         
+        # Results come back ranked (exact matches first, then partial matches)
         matches = []
-        for person_id, person in family_data['individuals'].items():
-            name_parts = []
-            if person.get('given_name'):
-                name_parts.append(person['given_name'])
-            if person.get('surname'):
-                name_parts.append(person['surname'])
-            
-            full_name = ' '.join(name_parts).lower()
-            
-            if query in full_name or any(query in part.lower() for part in name_parts if part):
-                matches.append({
-                    'id': person_id,
-                    'name': ' '.join(name_parts),
-                    'birth_year': person.get('birth_year', ''),
-                    'death_year': person.get('death_year', '')
-                })
-        
-        # Sort by relevance (exact matches first, then partial matches)
-        matches.sort(key=lambda x: (
-            0 if query == x['name'].lower() else 1,
-            x['name'].lower()
-        ))
+        for person_id, full_name in search_index.search(query, limit=20):
+            person = family_data['individuals'][person_id]
+            matches.append({
+                'id': person_id,
+                'name': full_name,
+                'birth_year': person.get('birth_year', ''),
+                'death_year': person.get('death_year', '')
+            })
         
         return jsonify({
             'success': True,
-            'matches': matches[:20]  # Limit to 20 results
+            'matches': matches
         })
         
     except Exception as e:
@@ -1051,18 +1556,13 @@ def save_feedback_list(feedback_list):
 
 def log_admin_action(action_type, action_data):
     """Log admin actions for audit purposes"""
-    audit_file = 'admin_audit.json'
-    
-    # Load existing audit log
-    if os.path.exists(audit_file):
-        with open(audit_file, 'r', encoding='utf-8') as f:
-            audit_log = json.load(f)
-    else:
-        audit_log = []
-    
-    # Create audit entry
-    audit_entry = {
-        'timestamp': datetime.now().isoformat(),
+    log_admin_actions([(action_type, action_data)])
+
+def log_admin_actions(actions):
+    """Log several (action_type, action_data) admin actions in one transaction"""
+    timestamp = datetime.now().isoformat()
+    db.add_audit_entries([{
+        'timestamp': timestamp,
         'action_type': action_type,
         'admin_session': session.get('admin_authenticated', 'unknown'),
         'admin_name': session.get('admin_name', 'Unknown Admin'),
@@ -1070,18 +1570,7 @@ def log_admin_action(action_type, action_data):
         'user_agent': request.headers.get('User-Agent', ''),
         'ip_address': request.remote_addr,
         'action_data': action_data
-    }
-    
-    # Add to log
-    audit_log.append(audit_entry)
-    
-    # Keep only last 1000 entries to prevent file from growing too large
-    if len(audit_log) > 1000:
-        audit_log = audit_log[-1000:]
-    
-    # Save back to file
-    with open(audit_file, 'w', encoding='utf-8') as f:
-        json.dump(audit_log, f, indent=2, ensure_ascii=False)
+    } for action_type, action_data in actions])
 
 def send_email(to_email, subject, body, from_email=None, from_name=None):
     """Send email using SMTP"""
@@ -1119,15 +1608,6 @@ def send_email(to_email, subject, body, from_email=None, from_name=None):
         print(f"Failed to send email: {str(e)}")
         return False
 
-def load_audit_log():
-    """Load admin audit log"""
-    audit_file = 'admin_audit.json'
-    
-    if os.path.exists(audit_file):
-        with open(audit_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
-
 def generate_gedcom_export(submissions):
     """Generate GEDCOM-compatible export of submissions"""
     gedcom_lines = []
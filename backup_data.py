@@ -5,7 +5,6 @@ Provides secure backup and restore functionality for family submissions and feed
 """
 
 import os
-import shutil
 import json
 import sqlite3
 from datetime import datetime
@@ -23,7 +22,7 @@ def create_backup():
     # Database file backup
     if os.path.exists('family_data.db'):
         backup_path = os.path.join(backup_dir, f"family_data_{timestamp}.db")
-        shutil.copy2('family_data.db', backup_path)
+        db.backup_to(backup_path)  # A plain file copy would miss changes still in the WAL
         print(f"✅ Database backed up to: {backup_path}")
     
     # Export to JSON for human readability
@@ -73,10 +72,10 @@ def restore_from_backup(backup_file):
             # Restore from SQLite database backup
             current_backup = f"family_data_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
             if os.path.exists('family_data.db'):
-                shutil.copy2('family_data.db', current_backup)
+                db.backup_to(current_backup)
                 print(f"💾 Current database backed up to: {current_backup}")
             
-            shutil.copy2(backup_file, 'family_data.db')
+            db.restore_from(backup_file)
             print(f"✅ Database restored from: {backup_file}")
             
         elif backup_file.endswith('.json'):
@@ -87,7 +86,7 @@ def restore_from_backup(backup_file):
             # Clear existing data (create fresh database)
             if os.path.exists('family_data.db'):
                 current_backup = f"family_data_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                shutil.copy2('family_data.db', current_backup)
+                db.backup_to(current_backup)
                 print(f"💾 Current database backed up to: {current_backup}")
             
             # Initialize fresh database
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Submission throughput benchmark for FamilyDatabase
+Compares a connection per call (the old access pattern) with the pooled WAL connections
+Usage: python benchmark_database.py [submissions_per_worker] [workers]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from multiprocessing import Process, Queue
+from database_setup import FamilyDatabase
+
+class ConnectPerCallDatabase(FamilyDatabase):
+    """The old access pattern: a new default connection for every call"""
+
+    def connection(self):
+        return sqlite3.connect(self.db_path)
+
+def make_submission(worker, index):
+    """A typical story submission"""
+    return {
+        'type': 'story_submission',
+        'person_name': f'Benchmark Person {worker}-{index}',
+        'relationship': 'Grandchild',
+        'story': 'A family story used for benchmarking. ' * 10,
+        'submitter_name': 'Benchmark',
+        'submitter_email': 'benchmark@example.com',
+        'person_id': f'I{index}'
+    }
+
+def run_worker(database_class, db_path, worker, count, results):
+    """Insert submissions one call at a time and report (inserted, locked errors)"""
+    database = database_class(db_path)
+    inserted = 0
+    locked = 0
+    for index in range(count):
+        try:
+            database.add_submission(make_submission(worker, index))
+            inserted += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    results.put((inserted, locked))
+
+def benchmark(label, database_class, count, workers):
+    """Time concurrent submission inserts against a fresh database file"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, 'benchmark.db')
+        database_class(db_path)  # Create the schema before timing
+
+        results = Queue()
+        processes = [Process(target=run_worker, args=(database_class, db_path, worker, count, results))
+                     for worker in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    inserted = sum(result[0] for result in totals)
+    locked = sum(result[1] for result in totals)
+    print(f"{label:28} {inserted:7} inserts {elapsed:8.2f}s {inserted / elapsed:10.0f}/s {locked:6} locked errors")
+    return inserted / elapsed
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    print(f"📊 Submission throughput, {workers} worker processes x {count} submissions")
+    print("-" * 80)
+    before = benchmark('Connection per call', ConnectPerCallDatabase, count, workers)
+    after = benchmark('Pooled WAL connections', FamilyDatabase, count, workers)
+    print("-" * 80)
+    print(f"Speedup: {after / before:.1f}x")
+
+if __name__ == '__main__':
+    main()
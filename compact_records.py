@@ -0,0 +1,140 @@
+import sys
+from collections.abc import Mapping, MutableMapping
+
+class CompactRecord(MutableMapping):
+    """Dict-compatible record that keeps its fields in __slots__ instead of a per-record dict"""
+
+    __slots__ = ()
+    # Keys a parsed record always has, reported as empty lists when unset
+    LIST_FIELDS = ()
+    # Keys the parser sets (possibly to None) whenever another key is set, e.g. a year with its date
+    DEPENDENT_FIELDS = {}
+
+    def __init__(self, **fields):
+        for field in self.__slots__:
+            setattr(self, field, fields.get(field))
+
+    @classmethod
+    def from_dict(cls, record):
+        """Build a compact record from a parsed dict, dropping parser scratch keys"""
+        return cls(**{field: record[field] for field in cls.__slots__ if record.get(field) not in (None, [])})
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            if key in self.LIST_FIELDS:
+                return []
+            if key in self.DEPENDENT_FIELDS and getattr(self, self.DEPENDENT_FIELDS[key]) is not None:
+                return None
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self.__slots__ or getattr(self, key) is None:
+            raise KeyError(key)
+        setattr(self, key, None)
+
+    def __iter__(self):
+        for field in self.__slots__:
+            if getattr(self, field) is not None or field in self.LIST_FIELDS:
+                yield field
+            elif field in self.DEPENDENT_FIELDS and getattr(self, self.DEPENDENT_FIELDS[field]) is not None:
+                yield field
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def to_dict(self):
+        """Plain dict copy for JSON output"""
+        return {key: record_to_dict(value) for key, value in self.items()}
+
+class NameRecord(CompactRecord):
+    __slots__ = ('given', 'surname', 'full')
+
+    @classmethod
+    def from_dict(cls, name_info):
+        """Build a name record with interned name parts"""
+        return cls(**{field: sys.intern(name_info.get(field, '')) for field in cls.__slots__})
+
+    def __iter__(self):
+        # Name parts are always present, even when empty
+        return iter(self.__slots__)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+class CompactIndividual(CompactRecord):
+    __slots__ = ('names', 'events', 'child_of_families', 'spouse_in_families', 'notes', 'sex',
+                 'birth_date', 'birth_year', 'birth_place', 'death_date', 'death_year', 'death_place',
+                 'families_as_spouse', 'families_as_child')
+    LIST_FIELDS = ('names', 'events', 'child_of_families', 'spouse_in_families', 'notes')
+    DEPENDENT_FIELDS = {'birth_year': 'birth_date', 'death_year': 'death_date'}
+
+    @classmethod
+    def from_dict(cls, record):
+        """Build a compact individual with interned IDs and names"""
+        individual = super().from_dict(record)
+        if individual.names:
+            individual.names = tuple(NameRecord.from_dict(name_info) for name_info in individual.names)
+        for field in ('child_of_families', 'spouse_in_families', 'families_as_spouse', 'families_as_child'):
+            if getattr(individual, field):
+                setattr(individual, field, [sys.intern(family_id) for family_id in getattr(individual, field)])
+        if individual.sex:
+            individual.sex = sys.intern(individual.sex)
+        return individual
+
+class CompactFamily(CompactRecord):
+    __slots__ = ('children', 'events', 'husband', 'wife', 'marriage_date', 'marriage_year', 'marriage_place')
+    LIST_FIELDS = ('children', 'events')
+    DEPENDENT_FIELDS = {'marriage_year': 'marriage_date'}
+
+    @classmethod
+    def from_dict(cls, record):
+        """Build a compact family with interned IDs"""
+        family = super().from_dict(record)
+        if family.children:
+            family.children = [sys.intern(child_id) for child_id in family.children]
+        for field in ('husband', 'wife'):
+            if getattr(family, field):
+                setattr(family, field, sys.intern(getattr(family, field)))
+        return family
+
+def record_to_dict(value):
+    """Convert compact records (and lists of them) back into plain JSON-ready values"""
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [record_to_dict(item) for item in value]
+    return value
+
+def compact_family_data(family_data):
+    """Replace the parsed individual and family dicts with compact records, in place"""
+    for key, record_class in (('individuals', CompactIndividual), ('families', CompactFamily)):
+        records = family_data[key]
+        items = list(records.items())
+        records.clear()
+        for record_id, record in items:
+            records[sys.intern(record_id)] = record_class.from_dict(record)
+    return family_data
+
+def compact_changed_records(family_data, person_ids=(), family_ids=()):
+    """Compact records that were replaced by plain dicts, e.g. after a GEDCOM re-sync"""
+    for key, record_class, record_ids in (('individuals', CompactIndividual, person_ids),
+                                          ('families', CompactFamily, family_ids)):
+        records = family_data[key]
+        for record_id in record_ids:
+            record = records.get(record_id)
+            if isinstance(record, Mapping) and not isinstance(record, record_class):
+                records[record_id] = record_class.from_dict(record)
@@ -1,18 +1,101 @@
 import sqlite3
 import json
 import os
+import threading
 from datetime import datetime
 import logging
 
+# Connection settings applied to every pooled connection
+BUSY_TIMEOUT_SECONDS = 10
+CACHED_STATEMENTS = 256
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',      # Readers don't block the writer and vice versa
+    'PRAGMA synchronous=NORMAL',    # Durable with WAL, without an fsync per commit
+    'PRAGMA cache_size=-8000',      # 8 MB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+    f'PRAGMA busy_timeout={BUSY_TIMEOUT_SECONDS * 1000}'
+)
+
+# Indexes behind the admin list queries; SQLite appends the rowid (id) to every index,
+# so each one also serves the keyset order (created_at DESC, id DESC) and COUNT(*) without touching the table
+INDEXES = {
+    'idx_submissions_created': 'submissions(created_at)',
+    'idx_submissions_archived_created': 'submissions(archived, created_at)',
+    'idx_submissions_archived_type_created': 'submissions(archived, type, created_at)',
+    'idx_submissions_archived_triage_created': 'submissions(archived, triage_status, created_at)',
+    'idx_submissions_person_created': 'submissions(person_id, created_at)',
+    'idx_feedback_created': 'feedback(created_at)',
+    'idx_feedback_archived_created': 'feedback(archived, created_at)',
+    'idx_feedback_archived_type_created': 'feedback(archived, feedback_type, created_at)',
+    'idx_feedback_archived_triage_created': 'feedback(archived, triage_status, created_at)',
+    'idx_audit_log_timestamp': 'audit_log(timestamp)',
+    'idx_audit_log_action_timestamp': 'audit_log(action_type, timestamp)'
+}
+
+# Largest page the query API returns
+MAX_PAGE_SIZE = 200
+
+# Audit log rotation: past this many rows the oldest entries move to JSONL segments in AUDIT_ARCHIVE_DIR
+AUDIT_LOG_MAX_ENTRIES = 100000
+AUDIT_ARCHIVE_DIR = 'audit_archive'
+AUDIT_ROTATE_INTERVAL = 1000  # Inserts between rotation checks
+
+def encode_cursor(row_time, row_id):
+    """Opaque page cursor for the row a page ended on."""
+    return f"{row_time}|{row_id}"
+
+def decode_cursor(cursor):
+    """Split a page cursor back into (time, id); raises ValueError if it is malformed."""
+    row_time, separator, row_id = cursor.rpartition('|')
+    if not separator or not row_time or not row_id.isdigit():
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    return row_time, int(row_id)
+
 class FamilyDatabase:
     def __init__(self, db_path='family_data.db'):
         self.db_path = db_path
+        # One connection per thread (and per process, since gunicorn forks after import)
+        self._local = threading.local()
         self.init_database()
         self.migrate_existing_data()
     
+    def connection(self):
+        """Get this thread's pooled connection; use it as `with db.connection() as conn:` for a transaction."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Statements are compiled once per connection and reused from its statement cache
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS,
+                                   cached_statements=CACHED_STATEMENTS)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def close(self):
+        """Close this thread's pooled connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+    
+    def backup_to(self, backup_path):
+        """Copy the database, including changes still in the WAL, to another file."""
+        with sqlite3.connect(backup_path) as target:
+            self.connection().backup(target)
+        target.close()
+    
+    def restore_from(self, backup_path):
+        """Replace the database contents with those of a backup file."""
+        source = sqlite3.connect(backup_path)
+        try:
+            source.backup(self.connection())
+        finally:
+            source.close()
+    
     def init_database(self):
         """Initialize the database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             
             # Create submissions table
@@ -33,6 +116,9 @@ class FamilyDatabase:
                     notes TEXT,
                     sources TEXT,
                     person_data TEXT,
+                    triage_status TEXT DEFAULT 'pending',
+                    reference_person_id TEXT,
+                    reference_person_name TEXT,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
@@ -51,15 +137,47 @@ class FamilyDatabase:
                     archived INTEGER DEFAULT 0,
                     archived_at TEXT,
                     archived_by TEXT,
+                    notes TEXT,
+                    triage_status TEXT DEFAULT 'pending',
+                    reference_person_id TEXT,
+                    reference_person_name TEXT,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
             
+            # Create append-only admin audit log
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS audit_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    action_type TEXT NOT NULL,
+                    admin_session TEXT,
+                    admin_name TEXT,
+                    admin_email TEXT,
+                    user_agent TEXT,
+                    ip_address TEXT,
+                    action_data TEXT
+                )
+            ''')
+            
+            # Create settings table for values admins change at runtime
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    updated_at TEXT
+                )
+            ''')
+            
             conn.commit()
             
             # Migrate existing tables to add new columns if they don't exist
             self.migrate_table_structure(cursor)
             conn.commit()
+            
+            # Indexes go last, since some cover columns the migration adds
+            self.create_indexes(cursor)
+            conn.commit()
             logging.info("Database initialized successfully")
     
     def migrate_table_structure(self, cursor):
@@ -77,7 +195,10 @@ class FamilyDatabase:
                 'archived_by': 'TEXT',
                 'notes': 'TEXT',
                 'sources': 'TEXT',
-                'person_data': 'TEXT'
+                'person_data': 'TEXT',
+                'triage_status': "TEXT DEFAULT 'pending'",
+                'reference_person_id': 'TEXT',
+                'reference_person_name': 'TEXT'
             }
             
             for column, definition in new_columns.items():
@@ -95,17 +216,33 @@ class FamilyDatabase:
                 'submitter_email': 'TEXT', 
                 'archived': 'INTEGER DEFAULT 0',
                 'archived_at': 'TEXT',
-                'archived_by': 'TEXT'
+                'archived_by': 'TEXT',
+                'notes': 'TEXT',
+                'triage_status': "TEXT DEFAULT 'pending'",
+                'reference_person_id': 'TEXT',
+                'reference_person_name': 'TEXT'
             }
             
             for column, definition in new_columns.items():
                 if column not in existing_columns:
                     cursor.execute(f'ALTER TABLE feedback ADD COLUMN {column} {definition}')
                     logging.info(f"Added column {column} to feedback table")
+            
+            # Rows from before the archived default existed would be missed by `archived = 0`
+            for table in ('submissions', 'feedback'):
+                cursor.execute(f'UPDATE {table} SET archived = 0 WHERE archived IS NULL')
                     
         except Exception as e:
             logging.error(f"Error migrating table structure: {e}")
     
+    def create_indexes(self, cursor):
+        """Create the indexes used by the paginated queries if they don't exist."""
+        try:
+            for name, definition in INDEXES.items():
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {definition}')
+        except Exception as e:
+            logging.error(f"Error creating indexes: {e}")
+    
     def migrate_existing_data(self):
         """Migrate data from existing JSON files if they exist."""
         # Migrate submissions
@@ -114,7 +251,7 @@ class FamilyDatabase:
                 with open('family_submissions.json', 'r') as f:
                     submissions = json.load(f)
                 
-                with sqlite3.connect(self.db_path) as conn:
+                with self.connection() as conn:
                     cursor = conn.cursor()
                     for submission in submissions:
                         cursor.execute('''
@@ -144,7 +281,7 @@ class FamilyDatabase:
                 with open('family_feedback.json', 'r') as f:
                     feedback_list = json.load(f)
                 
-                with sqlite3.connect(self.db_path) as conn:
+                with self.connection() as conn:
                     cursor = conn.cursor()
                     for feedback in feedback_list:
                         cursor.execute('''
@@ -165,10 +302,23 @@ class FamilyDatabase:
                 logging.info("Migrated feedback from JSON to database")
             except Exception as e:
                 logging.error(f"Error migrating feedback: {e}")
+        
+        # Migrate the admin audit log; renaming it first means only one worker imports it
+        if os.path.exists('admin_audit.json'):
+            try:
+                os.rename('admin_audit.json', 'admin_audit.json.backup')
+                with open('admin_audit.json.backup', 'r', encoding='utf-8') as f:
+                    audit_log = json.load(f)
+                self.add_audit_entries(audit_log)
+                logging.info("Migrated admin audit log from JSON to database")
+            except FileNotFoundError:
+                pass  # Another worker renamed it first
+            except Exception as e:
+                logging.error(f"Error migrating admin audit log: {e}")
     
     def add_submission(self, submission_data):
         """Add a new family story submission."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO submissions 
@@ -196,7 +346,7 @@ class FamilyDatabase:
     
     def add_feedback(self, feedback_data):
         """Add new feedback."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO feedback 
@@ -220,37 +370,128 @@ class FamilyDatabase:
     
     def get_all_submissions(self):
         """Get all submissions as a list of dictionaries."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM submissions ORDER BY created_at DESC')
-            submissions = []
-            for row in cursor.fetchall():
-                submission = dict(row)
-                # Convert boolean fields
-                submission['archived'] = bool(submission.get('archived', 0))
-                # Parse JSON fields
-                if submission.get('person_data'):
-                    try:
-                        submission['person_data'] = json.loads(submission['person_data'])
-                    except:
-                        submission['person_data'] = {}
-                submissions.append(submission)
-            return submissions
+        return self.query_submissions(limit=None)[0]
     
     def get_all_feedback(self):
         """Get all feedback as a list of dictionaries."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM feedback ORDER BY created_at DESC')
-            feedback_list = []
-            for row in cursor.fetchall():
-                feedback = dict(row)
-                # Convert boolean fields
-                feedback['archived'] = bool(feedback.get('archived', 0))
-                feedback_list.append(feedback)
-            return feedback_list
+        return self.query_feedback(limit=None)[0]
+    
+    def query_submissions(self, archived=None, submission_type=None, triage_status=None, person_id=None,
+                          date_from=None, date_to=None, cursor=None, limit=50):
+        """Get one page of submissions, newest first, as (submissions, next_cursor)."""
+        filters = self._submission_filters(archived, submission_type, triage_status, person_id)
+        return self._query_page('submissions', filters, date_from, date_to, cursor, limit, self._submission_from_row)
+    
+    def query_feedback(self, archived=None, feedback_type=None, triage_status=None,
+                       date_from=None, date_to=None, cursor=None, limit=50):
+        """Get one page of feedback, newest first, as (feedback_list, next_cursor)."""
+        filters = self._feedback_filters(archived, feedback_type, triage_status)
+        return self._query_page('feedback', filters, date_from, date_to, cursor, limit, self._feedback_from_row)
+    
+    def count_submissions(self, archived=None, submission_type=None, triage_status=None, person_id=None,
+                          date_from=None, date_to=None):
+        """Count the submissions matching the same filters as query_submissions."""
+        filters = self._submission_filters(archived, submission_type, triage_status, person_id)
+        return self._count('submissions', filters, date_from, date_to)
+    
+    def count_feedback(self, archived=None, feedback_type=None, triage_status=None, date_from=None, date_to=None):
+        """Count the feedback matching the same filters as query_feedback."""
+        filters = self._feedback_filters(archived, feedback_type, triage_status)
+        return self._count('feedback', filters, date_from, date_to)
+    
+    def _submission_filters(self, archived, submission_type, triage_status, person_id):
+        """Column filters for submission queries."""
+        return {
+            'archived': None if archived is None else (1 if archived else 0),
+            'type': submission_type,
+            'triage_status': triage_status,
+            'person_id': person_id
+        }
+    
+    def _feedback_filters(self, archived, feedback_type, triage_status):
+        """Column filters for feedback queries."""
+        return {
+            'archived': None if archived is None else (1 if archived else 0),
+            'feedback_type': feedback_type,
+            'triage_status': triage_status
+        }
+    
+    def _where_clause(self, filters, date_from, date_to, time_column='created_at'):
+        """Build the WHERE clause for equality filters (None means any) and a time range."""
+        # date_from is inclusive and date_to exclusive, so consecutive ranges don't overlap
+        clauses = []
+        values = []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                values.append(value)
+        if date_from:
+            clauses.append(f"{time_column} >= ?")
+            values.append(date_from)
+        if date_to:
+            clauses.append(f"{time_column} < ?")
+            values.append(date_to)
+        return clauses, values
+    
+    def _query_page(self, table, filters, date_from, date_to, cursor, limit, from_row, time_column='created_at'):
+        """Keyset-paginated SELECT ordered by (time_column, id) descending; limit=None returns every row."""
+        clauses, values = self._where_clause(filters, date_from, date_to, time_column)
+        if cursor:
+            # Seek past the last row of the previous page instead of using OFFSET
+            last_time, last_id = decode_cursor(cursor)
+            clauses.append(f"({time_column}, id) < (?, ?)")
+            values.extend([last_time, last_id])
+        
+        query = f"SELECT * FROM {table}"
+        if clauses:
+            query += f" WHERE {' AND '.join(clauses)}"
+        query += f" ORDER BY {time_column} DESC, id DESC"
+        if limit is not None:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+            # One extra row tells whether there is a next page
+            query += " LIMIT ?"
+            values.append(limit + 1)
+        
+        with self.connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            cur.execute(query, values)
+            rows = cur.fetchall()
+        
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][time_column], rows[-1]['id'])
+        return [from_row(row) for row in rows], next_cursor
+    
+    def _count(self, table, filters, date_from, date_to, time_column='created_at'):
+        """COUNT(*) over the same filters as a page query."""
+        clauses, values = self._where_clause(filters, date_from, date_to, time_column)
+        query = f"SELECT COUNT(*) FROM {table}"
+        if clauses:
+            query += f" WHERE {' AND '.join(clauses)}"
+        with self.connection() as conn:
+            return conn.execute(query, values).fetchone()[0]
+    
+    def _submission_from_row(self, row):
+        """Convert a submissions row into a dictionary."""
+        submission = dict(row)
+        # Convert boolean fields
+        submission['archived'] = bool(submission.get('archived', 0))
+        # Parse JSON fields
+        if submission.get('person_data'):
+            try:
+                submission['person_data'] = json.loads(submission['person_data'])
+            except:
+                submission['person_data'] = {}
+        return submission
+    
+    def _feedback_from_row(self, row):
+        """Convert a feedback row into a dictionary."""
+        feedback = dict(row)
+        # Convert boolean fields
+        feedback['archived'] = bool(feedback.get('archived', 0))
+        return feedback
     
     def export_submissions_csv(self):
         """Export submissions to CSV format."""
@@ -301,53 +542,48 @@ class FamilyDatabase:
     
     def update_submission(self, submission_id, updates):
         """Update a submission by ID."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Build dynamic update query
-            set_clauses = []
-            values = []
-            for key, value in updates.items():
-                if key == 'archived':
-                    value = 1 if value else 0
-                elif key == 'person_data' and isinstance(value, dict):
-                    value = json.dumps(value)
-                set_clauses.append(f"{key} = ?")
-                values.append(value)
-            
-            if set_clauses:
-                query = f"UPDATE submissions SET {', '.join(set_clauses)} WHERE id = ?"
-                values.append(submission_id)
-                cursor.execute(query, values)
-                conn.commit()
-                return cursor.rowcount > 0
-            return False
+        return submission_id in self.bulk_update_submissions({submission_id: updates})
     
     def update_feedback(self, feedback_id, updates):
         """Update feedback by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        return feedback_id in self.bulk_update_feedback({feedback_id: updates})
+    
+    def bulk_update_submissions(self, updates_by_id):
+        """Apply {submission_id: updates} in one transaction; returns the IDs that were updated."""
+        return self._update_rows('submissions', updates_by_id)
+    
+    def bulk_update_feedback(self, updates_by_id):
+        """Apply {feedback_id: updates} in one transaction; returns the IDs that were updated."""
+        return self._update_rows('feedback', updates_by_id)
+    
+    def _update_rows(self, table, updates_by_id):
+        """Run one dynamic UPDATE per row, all committed together."""
+        updated_ids = []
+        with self.connection() as conn:
             cursor = conn.cursor()
-            
-            # Build dynamic update query
-            set_clauses = []
-            values = []
-            for key, value in updates.items():
-                if key == 'archived':
-                    value = 1 if value else 0
-                set_clauses.append(f"{key} = ?")
-                values.append(value)
-            
-            if set_clauses:
-                query = f"UPDATE feedback SET {', '.join(set_clauses)} WHERE id = ?"
-                values.append(feedback_id)
-                cursor.execute(query, values)
-                conn.commit()
-                return cursor.rowcount > 0
-            return False
+            for row_id, updates in updates_by_id.items():
+                # Build dynamic update query
+                set_clauses = []
+                values = []
+                for key, value in updates.items():
+                    if key == 'archived':
+                        value = 1 if value else 0
+                    elif key == 'person_data' and isinstance(value, dict):
+                        value = json.dumps(value)
+                    set_clauses.append(f"{key} = ?")
+                    values.append(value)
+                
+                if set_clauses:
+                    values.append(row_id)
+                    cursor.execute(f"UPDATE {table} SET {', '.join(set_clauses)} WHERE id = ?", values)
+                    if cursor.rowcount > 0:
+                        updated_ids.append(row_id)
+            conn.commit()
+        return updated_ids
     
     def delete_submission(self, submission_id):
         """Delete a submission by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM submissions WHERE id = ?", (submission_id,))
             conn.commit()
@@ -355,11 +591,168 @@ class FamilyDatabase:
     
     def delete_feedback(self, feedback_id):
         """Delete feedback by ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM feedback WHERE id = ?", (feedback_id,))
             conn.commit()
             return cursor.rowcount > 0
 
+    def archive_submissions(self, submission_ids, archived_by):
+        """Archive submissions by ID in one transaction; returns the rows that were archived."""
+        return self._archive_rows('submissions', submission_ids, archived_by, self._submission_from_row)
+    
+    def archive_feedback(self, feedback_ids, archived_by):
+        """Archive feedback by ID in one transaction; returns the rows that were archived."""
+        return self._archive_rows('feedback', feedback_ids, archived_by, self._feedback_from_row)
+    
+    def delete_archived_submissions(self, submission_ids):
+        """Permanently delete archived submissions by ID in one transaction; returns the deleted rows."""
+        return self._delete_archived_rows('submissions', submission_ids, self._submission_from_row)
+    
+    def delete_archived_feedback(self, feedback_ids):
+        """Permanently delete archived feedback by ID in one transaction; returns the deleted rows."""
+        return self._delete_archived_rows('feedback', feedback_ids, self._feedback_from_row)
+    
+    def _select_for_update(self, conn, table, row_ids, archived, from_row):
+        """Start a write transaction and read the rows about to change."""
+        # Taking the write lock up front means no other worker can change these rows in between
+        conn.execute('BEGIN IMMEDIATE')
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute(f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(row_ids))}) AND archived = ?",
+                       list(row_ids) + [archived])
+        return [from_row(row) for row in cursor.fetchall()]
+    
+    def _archive_rows(self, table, row_ids, archived_by, from_row):
+        """Archive the not yet archived rows among row_ids."""
+        row_ids = list(dict.fromkeys(row_ids))
+        if not row_ids:
+            return []
+        with self.connection() as conn:
+            rows = self._select_for_update(conn, table, row_ids, 0, from_row)
+            if rows:
+                archived_at = datetime.now().isoformat()
+                archived_ids = [row['id'] for row in rows]
+                conn.execute(f"UPDATE {table} SET archived = 1, archived_at = ?, archived_by = ? "
+                             f"WHERE id IN ({', '.join('?' * len(archived_ids))})",
+                             [archived_at, archived_by] + archived_ids)
+                for row in rows:
+                    row.update(archived=True, archived_at=archived_at, archived_by=archived_by)
+            conn.commit()
+            return rows
+    
+    def _delete_archived_rows(self, table, row_ids, from_row):
+        """Delete the archived rows among row_ids."""
+        row_ids = list(dict.fromkeys(row_ids))
+        if not row_ids:
+            return []
+        with self.connection() as conn:
+            rows = self._select_for_update(conn, table, row_ids, 1, from_row)
+            if rows:
+                deleted_ids = [row['id'] for row in rows]
+                conn.execute(f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(deleted_ids))})", deleted_ids)
+            conn.commit()
+            return rows
+
+    def add_audit_entries(self, entries):
+        """Append audit log entries in one transaction."""
+        if not entries:
+            return
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            entry_ids = []
+            for entry in entries:
+                admin_session = entry.get('admin_session')
+                cursor.execute('''
+                    INSERT INTO audit_log
+                    (timestamp, action_type, admin_session, admin_name, admin_email, user_agent, ip_address, action_data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    entry.get('timestamp') or datetime.now().isoformat(),
+                    entry.get('action_type', ''),
+                    None if admin_session is None else str(admin_session),
+                    entry.get('admin_name'),
+                    entry.get('admin_email'),
+                    entry.get('user_agent'),
+                    entry.get('ip_address'),
+                    json.dumps(entry.get('action_data'), ensure_ascii=False, default=str)
+                ))
+                entry_ids.append(cursor.lastrowid)
+            conn.commit()
+        
+        # Check the table size whenever the IDs cross a multiple of the rotation interval
+        if entry_ids[-1] // AUDIT_ROTATE_INTERVAL != (entry_ids[0] - 1) // AUDIT_ROTATE_INTERVAL:
+            self.rotate_audit_log()
+    
+    def rotate_audit_log(self, max_entries=AUDIT_LOG_MAX_ENTRIES, archive_dir=AUDIT_ARCHIVE_DIR):
+        """Move the oldest audit entries beyond max_entries into a JSONL segment; returns its path or None."""
+        with self.connection() as conn:
+            # Holding the write lock keeps two workers from archiving the same rows
+            conn.execute('BEGIN IMMEDIATE')
+            excess = conn.execute('SELECT COUNT(*) FROM audit_log').fetchone()[0] - max_entries
+            if excess <= 0:
+                conn.commit()
+                return None
+            
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute('SELECT * FROM audit_log ORDER BY id LIMIT ?', (excess,))
+            entries = [self._audit_entry_from_row(row) for row in cursor.fetchall()]
+            
+            # The segment is on disk before the rows are deleted, so a crash can duplicate entries but never lose them
+            os.makedirs(archive_dir, exist_ok=True)
+            segment_path = os.path.join(archive_dir, f"audit-{entries[0]['id']:012d}-{entries[-1]['id']:012d}.jsonl")
+            with open(segment_path, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            
+            conn.execute('DELETE FROM audit_log WHERE id <= ?', (entries[-1]['id'],))
+            conn.commit()
+            logging.info(f"Rotated {len(entries)} audit log entries to {segment_path}")
+            return segment_path
+    
+    def query_audit_log(self, action_type=None, date_from=None, date_to=None, cursor=None, limit=50):
+        """Get one page of audit log entries, newest first, as (entries, next_cursor)."""
+        return self._query_page('audit_log', {'action_type': action_type}, date_from, date_to, cursor, limit,
+                                self._audit_entry_from_row, time_column='timestamp')
+    
+    def count_audit_log(self, action_type=None, date_from=None, date_to=None):
+        """Count the audit log entries matching the same filters as query_audit_log."""
+        return self._count('audit_log', {'action_type': action_type}, date_from, date_to, time_column='timestamp')
+    
+    def _audit_entry_from_row(self, row):
+        """Convert an audit_log row into a dictionary."""
+        entry = dict(row)
+        if entry.get('action_data'):
+            try:
+                entry['action_data'] = json.loads(entry['action_data'])
+            except:
+                pass
+        return entry
+    
+    def get_setting(self, key, default=None):
+        """Get a runtime setting by key."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+            row = cursor.fetchone()
+            return row[0] if row else default
+    
+    def set_setting(self, key, value):
+        """Store a runtime setting; None removes it."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            if value is None:
+                cursor.execute("DELETE FROM settings WHERE key = ?", (key,))
+            else:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO settings (key, value, updated_at)
+                    VALUES (?, ?, ?)
+                ''', (key, value, datetime.now().isoformat()))
+            conn.commit()
+            return True
+
 # Initialize database instance
 db = FamilyDatabase() 
\ No newline at end of file
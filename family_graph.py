@@ -0,0 +1,303 @@
+from array import array
+
+class FamilyGraph:
+    """Adjacency index of parent, child, spouse and sibling edges built once from parsed GEDCOM data"""
+
+    # Edge types, in the order the calculators have always checked them
+    CHILD = 'child'
+    PARENT = 'parent'
+    SPOUSE = 'spouse'
+    SIBLING = 'sibling'
+    # Edge type of each code stored in edge_codes
+    EDGE_TYPES = (CHILD, PARENT, SPOUSE, SIBLING)
+    TYPE_CODES = {edge_type: code for code, edge_type in enumerate(EDGE_TYPES)}
+    # Predecessor of nodes a BFS did not reach; the start node's predecessor is -1
+    UNREACHED = -2
+
+    def __init__(self, family_data):
+        self.individuals = family_data['individuals']
+        self.families = family_data['families']
+        self.parents = {}
+        self.children = {}
+        self.spouses = {}
+        self.siblings = {}
+        # Dense integer numbering of every person that appears in a family link
+        self.person_ids = []
+        self.person_index = {}
+        # CSR-style adjacency: the neighbors of node n are targets[starts[n]:ends[n]]. A re-sync writes
+        # the changed rows at the end instead of repacking, so rows are not always contiguous
+        self.edge_starts = array('l')
+        self.edge_ends = array('l')
+        self.edge_targets = array('l')
+        self.edge_codes = array('b')
+        self.parent_starts = array('l')
+        self.parent_ends = array('l')
+        self.parent_targets = array('l')
+        self.child_starts = array('l')
+        self.child_ends = array('l')
+        self.child_targets = array('l')
+        # Slots of edge_targets left behind by rewritten rows
+        self.stale_edges = 0
+        self.build()
+
+    def build(self):
+        """Build the edge lists for every individual"""
+        self.parents = {}
+        self.children = {}
+        self.spouses = {}
+        self.siblings = {}
+
+        for person_id in self.individuals:
+            self.add_person(person_id)
+        self.build_arrays()
+
+    def add_person(self, person_id):
+        """Derive the edges of a single person from their family records"""
+        person = self.individuals.get(person_id, {})
+        parents = []
+        children = []
+        spouses = []
+        siblings = []
+
+        # Get parents and siblings through child_of_families
+        for family_id in person.get('child_of_families', []):
+            family = self.families.get(family_id, {})
+            for parent_id in (family.get('husband'), family.get('wife')):
+                if parent_id and parent_id not in parents:
+                    parents.append(parent_id)
+            for child_id in family.get('children', []):
+                if child_id != person_id and child_id not in siblings:
+                    siblings.append(child_id)
+
+        # Get spouses and children through spouse_in_families
+        for family_id in person.get('spouse_in_families', []):
+            family = self.families.get(family_id, {})
+            if family.get('husband') == person_id and family.get('wife'):
+                spouse_id = family['wife']
+            elif family.get('wife') == person_id and family.get('husband'):
+                spouse_id = family['husband']
+            else:
+                spouse_id = None
+            if spouse_id and spouse_id not in spouses:
+                spouses.append(spouse_id)
+            for child_id in family.get('children', []):
+                if child_id not in children:
+                    children.append(child_id)
+
+        self.parents[person_id] = parents
+        self.children[person_id] = children
+        self.spouses[person_id] = spouses
+        self.siblings[person_id] = siblings
+
+    def _person_edges(self, person_id):
+        """Map each neighbor to its edge type; when two people are linked in more than one way the first type wins"""
+        edges = {}
+        for edge_type, index in ((self.CHILD, self.children), (self.PARENT, self.parents),
+                                 (self.SPOUSE, self.spouses), (self.SIBLING, self.siblings)):
+            for neighbor_id in index.get(person_id, []):
+                edges.setdefault(neighbor_id, edge_type)
+        return edges
+
+    def build_arrays(self):
+        """Number every person and pack the edge lists into adjacency arrays"""
+        self.person_ids = list(self.individuals)
+        self.person_index = {person_id: node for node, person_id in enumerate(self.person_ids)}
+
+        self.edge_starts, self.edge_ends = array('l'), array('l')
+        self.edge_targets, self.edge_codes = array('l'), array('b')
+        self.parent_starts, self.parent_ends, self.parent_targets = array('l'), array('l'), array('l')
+        self.child_starts, self.child_ends, self.child_targets = array('l'), array('l'), array('l')
+        self.stale_edges = 0
+        self._write_new_rows()
+
+    def _write_new_rows(self):
+        """Write the rows of nodes that have none yet"""
+        # Families can name people without a record; they get a node too and the list grows as we go
+        while len(self.edge_starts) < len(self.person_ids):
+            for starts in (self.edge_starts, self.edge_ends, self.parent_starts, self.parent_ends,
+                           self.child_starts, self.child_ends):
+                starts.append(0)
+            self._write_rows(len(self.edge_starts) - 1)
+
+    def _write_rows(self, node):
+        """Append the edges of a node to the target arrays and point the node at them"""
+        person_id = self.person_ids[node]
+        edges = self._person_edges(person_id)
+
+        self.edge_starts[node] = len(self.edge_targets)
+        self.edge_targets.extend(self._node(neighbor_id) for neighbor_id in edges)
+        self.edge_codes.extend(self.TYPE_CODES[edge_type] for edge_type in edges.values())
+        self.edge_ends[node] = len(self.edge_targets)
+
+        self.parent_starts[node] = len(self.parent_targets)
+        self.parent_targets.extend(self._node(parent_id) for parent_id in self.parents.get(person_id, []))
+        self.parent_ends[node] = len(self.parent_targets)
+
+        self.child_starts[node] = len(self.child_targets)
+        self.child_targets.extend(self._node(child_id) for child_id in self.children.get(person_id, []))
+        self.child_ends[node] = len(self.child_targets)
+
+    def _node(self, person_id):
+        """Integer node of a person, numbering people seen for the first time"""
+        node = self.person_index.get(person_id)
+        if node is None:
+            node = len(self.person_ids)
+            self.person_index[person_id] = node
+            self.person_ids.append(person_id)
+        return node
+
+    def update_people(self, person_ids):
+        """Re-derive the edges of people whose records changed; returns those whose edges differ"""
+        changed = set()
+        for person_id in person_ids:
+            old_edges = self._person_edges(person_id)
+            if person_id in self.individuals:
+                self.add_person(person_id)
+            else:
+                for index in (self.parents, self.children, self.spouses, self.siblings):
+                    index.pop(person_id, None)
+            if self._person_edges(person_id) != old_edges:
+                changed.add(person_id)
+
+        # Rewrite only the rows that changed; new people get a node at the end
+        for person_id in person_ids:
+            node = self.person_index.get(person_id)
+            if node is None:
+                if person_id in self.individuals:
+                    self._node(person_id)
+            elif person_id in changed and node < len(self.edge_starts):
+                self.stale_edges += self.edge_ends[node] - self.edge_starts[node]
+                self._write_rows(node)
+        self._write_new_rows()
+
+        # Repack once the abandoned slots outnumber the live ones
+        if self.stale_edges > len(self.edge_targets) // 2:
+            self.build_arrays()
+        return changed
+
+    def get_parents(self, person_id):
+        """Get the parents of a person"""
+        return self.parents.get(person_id, [])
+
+    def get_children(self, person_id):
+        """Get the children of a person"""
+        return self.children.get(person_id, [])
+
+    def get_spouses(self, person_id):
+        """Get the spouses of a person"""
+        return self.spouses.get(person_id, [])
+
+    def get_siblings(self, person_id):
+        """Get the siblings of a person"""
+        return self.siblings.get(person_id, [])
+
+    def get_connected(self, person_id):
+        """Get all people directly connected to this person, mapped to the edge type"""
+        node = self.person_index.get(person_id)
+        if node is None:
+            return {}
+        return {self.person_ids[self.edge_targets[position]]: self.EDGE_TYPES[self.edge_codes[position]]
+                for position in range(self.edge_starts[node], self.edge_ends[node])}
+
+    def get_edge_type(self, person1_id, person2_id):
+        """Get what person2 is to person1 ('parent', 'child', 'spouse', 'sibling') or None"""
+        node = self.person_index.get(person1_id)
+        target = self.person_index.get(person2_id)
+        if node is None or target is None:
+            return None
+        # One scan of the node's row, without copying it
+        try:
+            position = self.edge_targets.index(target, self.edge_starts[node], self.edge_ends[node])
+        except ValueError:
+            return None
+        return self.EDGE_TYPES[self.edge_codes[position]]
+
+    def neighbor_nodes(self, node):
+        """Integer nodes adjacent to a node, over every edge type"""
+        return self.edge_targets[self.edge_starts[node]:self.edge_ends[node]]
+
+    def bfs_tree(self, start_id):
+        """BFS over every edge type from a person; returns (predecessors, edge codes) indexed by node"""
+        # The edge code of a node is the type of the node relative to its predecessor
+        predecessors = array('l', [self.UNREACHED]) * len(self.person_ids)
+        codes = bytearray(len(self.person_ids))
+        start = self.person_index.get(start_id)
+        if start is None:
+            return predecessors, codes
+
+        starts, ends, targets, edge_codes = self.edge_starts, self.edge_ends, self.edge_targets, self.edge_codes
+        predecessors[start] = -1
+        # The queue is a list we append to while iterating, which is cheaper than a deque here
+        queue = [start]
+        for node in queue:
+            position = starts[node]
+            for target in targets[position:ends[node]]:
+                if predecessors[target] == self.UNREACHED:
+                    predecessors[target] = node
+                    codes[target] = edge_codes[position]
+                    queue.append(target)
+                position += 1
+        return predecessors, codes
+
+    def path_to(self, tree, person_id):
+        """Rebuild the path from the BFS start to a person as (person IDs, edge types between them)"""
+        predecessors, codes = tree
+        node = self.person_index.get(person_id)
+        # People added since the BFS ran have no entry in the tree
+        if node is None or node >= len(predecessors) or predecessors[node] == self.UNREACHED:
+            return None, None
+        path = []
+        edge_types = []
+        while predecessors[node] != -1:
+            path.append(self.person_ids[node])
+            edge_types.append(self.EDGE_TYPES[codes[node]])
+            node = predecessors[node]
+        path.append(self.person_ids[node])
+        path.reverse()
+        edge_types.reverse()
+        return path, edge_types
+
+    def generation_offsets(self, start_id):
+        """BFS from a person counting +1 per child edge and -1 per parent edge; returns {person_id: offset}"""
+        start = self.person_index.get(start_id)
+        if start is None:
+            return {}
+
+        # Child and parent edge codes shift the generation, spouses and siblings keep it
+        steps = array('l', [1, -1, 0, 0])
+        starts, ends, targets, codes = self.edge_starts, self.edge_ends, self.edge_targets, self.edge_codes
+        levels = [None] * len(self.person_ids)
+        levels[start] = 0
+        queue = [start]
+        for node in queue:
+            level = levels[node]
+            position = starts[node]
+            for target in targets[position:ends[node]]:
+                if levels[target] is None:
+                    levels[target] = level + steps[codes[position]]
+                    queue.append(target)
+                position += 1
+        return {self.person_ids[node]: level for node, level in enumerate(levels) if level is not None}
+
+    def iter_lineage(self, person_id, generations, ancestors=True):
+        """Yield (person_id, generation) for ancestors (or descendants), each pair once, nearest generations first"""
+        node = self.person_index.get(person_id)
+        if node is None:
+            return
+        if ancestors:
+            starts, ends, targets = self.parent_starts, self.parent_ends, self.parent_targets
+        else:
+            starts, ends, targets = self.child_starts, self.child_ends, self.child_targets
+
+        # Each level holds a person once, so pedigree collapse can't make the levels grow exponentially
+        current_generation = [node]
+        for generation in range(1, generations + 1):
+            next_generation = {}
+            for current in current_generation:
+                for relative in targets[starts[current]:ends[current]]:
+                    next_generation[relative] = None
+            if not next_generation:
+                return
+            for relative in next_generation:
+                yield self.person_ids[relative], generation
+            current_generation = next_generation
@@ -1,30 +1,56 @@
 import re
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from compact_records import record_to_dict
+
+# Increment when the structure of the parsed data changes so old snapshots are ignored
+SNAPSHOT_VERSION = 3
+
+# Python codecs for the single-byte values of the GEDCOM "1 CHAR" header. Files often say
+# ASCII or ANSI but are really UTF-8, so these are only used when the bytes aren't valid UTF-8
+GEDCOM_ENCODINGS = {
+    'ANSI': 'cp1252',
+    'ASCII': 'ascii',
+    'ANSEL': 'latin-1'  # No Python codec; latin-1 keeps the plain ASCII subset intact
+}
+
+# Level-0 headers of the records we keep; a batch of records may start at one
+RECORD_HEADER_PATTERN = re.compile(r'^0 @([^@]+)@ (INDI|FAM|NOTE)$')
+
+def _parse_record_batch(records):
+    """Parse a batch of records in a worker process (no cross-reference post-processing)"""
+    parser = GedcomParser()
+    for record in records:
+        parser.parse_record(record)
+    return parser.individuals, parser.families, parser.notes, parser.record_versions
 
 class GedcomParser:
     def __init__(self):
         self.individuals = {}
         self.families = {}
         self.notes = {}
+        # Digest of every INDI/FAM/NOTE record, used to find what changed on a re-sync
+        self.record_versions = {'INDI': {}, 'FAM': {}, 'NOTE': {}}
         self.current_record = None
         self.current_record_type = None
+        # note_id -> ids of individuals referencing it, built on the first re-sync
+        self._note_references = None
         
     def parse_file(self, filename):
         """Parse a GEDCOM file and return structured data"""
-        self.individuals = {}
-        self.families = {}
-        self.notes = {}
+        self._reset()
         
-        try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-        except UnicodeDecodeError:
-            # Try with different encoding if UTF-8 fails
-            with open(filename, 'r', encoding='latin-1') as file:
-                lines = file.readlines()
-        
-        for line in lines:
-            self.parse_line(line.strip())
+        def parse_records(encoding):
+            self._reset()
+            for record in self.iter_records(filename, encoding):
+                self.parse_record(record)
+        self._read_with_fallback(filename, parse_records)
         
         # Post-process to add family references to individuals
         self._add_family_references()
@@ -32,12 +58,396 @@ class GedcomParser:
         # Resolve note references
         self._resolve_note_references()
         
+        return self._family_data()
+    
+    def _reset(self):
+        """Forget all parsed records"""
+        self.individuals = {}
+        self.families = {}
+        self.notes = {}
+        self.record_versions = {'INDI': {}, 'FAM': {}, 'NOTE': {}}
+        self.current_record = None
+        self.current_record_type = None
+        self._note_references = None
+    
+    def _family_data(self):
+        """The parsed data as handed to the rest of the app"""
         return {
             'individuals': self.individuals,
             'families': self.families,
-            'notes': self.notes
+            'notes': self.notes,
+            'record_versions': self.record_versions
         }
     
+    def _plain_family_data(self):
+        """The parsed data with any compact records the app swapped in turned back into plain dicts"""
+        # Keeps the snapshot format independent of COMPACT_RECORDS
+        data = self._family_data()
+        for key in ('individuals', 'families'):
+            data[key] = {record_id: record_to_dict(record) for record_id, record in data[key].items()}
+        return data
+    
+    def parse_record(self, record):
+        """Parse the lines of one level-0 record and remember its digest"""
+        for line in record:
+            self.parse_line(line)
+        
+        header_match = RECORD_HEADER_PATTERN.match(record[0])
+        if header_match:
+            record_id, record_type = header_match.groups()
+            self.record_versions[record_type][record_id] = self._record_digest(record)
+    
+    def _record_digest(self, record):
+        """Digest of a record's lines, including its CHAN timestamp"""
+        return hashlib.blake2b('\n'.join(record).encode('utf-8'), digest_size=16).hexdigest()
+    
+    def parse_file_parallel(self, filename, workers=None, chunk_lines=50000):
+        """Parse a GEDCOM file in a process pool; the result matches parse_file exactly"""
+        self._reset()
+        
+        def parse_batches(encoding):
+            self._reset()
+            self._parse_batches_in_pool(filename, encoding, workers, chunk_lines)
+        self._read_with_fallback(filename, parse_batches)
+        
+        # Cross-references can span batches, so resolve them after the merge
+        self._add_family_references()
+        self._resolve_note_references()
+        
+        return self._family_data()
+    
+    def _parse_batches_in_pool(self, filename, encoding, workers, chunk_lines):
+        """Send record batches to worker processes and merge their results in file order"""
+        workers = workers or os.cpu_count() or 1
+        pending = deque()
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in self._iter_record_batches(filename, encoding, chunk_lines):
+                pending.append(executor.submit(_parse_record_batch, batch))
+                # Keep a bounded number of batches in flight
+                if len(pending) >= workers * 2:
+                    self._merge_batch(*pending.popleft().result())
+            
+            while pending:
+                self._merge_batch(*pending.popleft().result())
+    
+    def _iter_record_batches(self, filename, encoding, chunk_lines):
+        """Group records into batches of about chunk_lines lines, split only before INDI/FAM/NOTE records"""
+        batch = []
+        batch_lines = 0
+        for record in self.iter_records(filename, encoding):
+            if batch_lines >= chunk_lines and RECORD_HEADER_PATTERN.match(record[0]):
+                yield batch
+                batch = []
+                batch_lines = 0
+            batch.append(record)
+            batch_lines += len(record)
+        
+        if batch:
+            yield batch
+    
+    def _merge_batch(self, individuals, families, notes, record_versions):
+        """Merge one parsed batch; later records replace earlier ones with the same ID, as in parse_file"""
+        self.individuals.update(individuals)
+        self.families.update(families)
+        self.notes.update(notes)
+        for record_type, versions in record_versions.items():
+            self.record_versions[record_type].update(versions)
+    
+    def detect_encodings(self, filename):
+        """Encodings to try in order, from the byte order mark or the CHAR header; the last one never fails"""
+        with open(filename, 'rb') as file:
+            head = file.read(4096)
+        
+        if head.startswith(b'\xef\xbb\xbf'):
+            return ['utf-8-sig', 'latin-1']
+        if head.startswith(b'\xff\xfe') or head.startswith(b'\xfe\xff'):
+            return ['utf-16', 'latin-1']
+        # UTF-16 without a BOM: the leading "0" is padded with a null byte
+        if head.startswith(b'0\x00'):
+            return ['utf-16-le', 'latin-1']
+        if head.startswith(b'\x000'):
+            return ['utf-16-be', 'latin-1']
+        
+        # Anything else is 8-bit, so a UNICODE/UTF-16 label can't be right; strict UTF-8 comes
+        # first, then the codec of a single-byte label, then latin-1
+        encodings = ['utf-8']
+        # The CHAR line is ASCII in every single-byte encoding
+        char_match = re.search(rb'(?:^|[\r\n])\s*1\s+CHAR\s+([^\r\n]+)', head)
+        if char_match:
+            declared = char_match.group(1).decode('ascii', 'ignore').strip().upper()
+            if declared in GEDCOM_ENCODINGS:
+                encodings.append(GEDCOM_ENCODINGS[declared])
+        if 'latin-1' not in encodings:
+            encodings.append('latin-1')
+        return encodings
+    
+    def _read_with_fallback(self, filename, read):
+        """Call read(encoding) with each candidate encoding until one decodes the whole file"""
+        encodings = self.detect_encodings(filename)
+        for encoding, next_encoding in zip(encodings, encodings[1:]):
+            try:
+                return read(encoding)
+            except UnicodeError:
+                # UnicodeError also covers the UTF-16 codec's missing-BOM error
+                logging.warning(f"{filename} is not valid {encoding}, re-reading as {next_encoding}")
+        return read(encodings[-1])
+    
+    def iter_records(self, filename, encoding='utf-8'):
+        """Read a GEDCOM file incrementally, yielding the stripped lines of one level-0 record at a time"""
+        record = []
+        # Universal newlines also handle the CR-only line endings MacFamilyTree writes
+        with open(filename, 'r', encoding=encoding) as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith('0 ') and record:
+                    yield record
+                    record = []
+                record.append(line)
+        
+        if record:
+            yield record
+    
+    def parse_file_cached(self, filename, snapshot_path=None, workers=1):
+        """Load parsed data from a snapshot of the GEDCOM file, re-parsing only when it changed"""
+        if snapshot_path is None:
+            snapshot_path = filename + '.snapshot'
+        
+        source_stat = os.stat(filename)
+        source_hash = None
+        snapshot = self._read_snapshot(snapshot_path)
+        
+        if snapshot:
+            # Same size and mtime means the same file; otherwise compare content hashes
+            # (a redeploy touches the mtime without changing the file)
+            if snapshot['source_size'] == source_stat.st_size and snapshot['source_mtime'] == source_stat.st_mtime_ns:
+                return self._load_snapshot_data(snapshot['data'])
+            source_hash = self._hash_file(filename)
+            if snapshot['source_hash'] == source_hash:
+                self._write_snapshot(snapshot_path, snapshot['data'], source_stat, source_hash)
+                return self._load_snapshot_data(snapshot['data'])
+        
+        if workers > 1:
+            data = self.parse_file_parallel(filename, workers=workers)
+        else:
+            data = self.parse_file(filename)
+        if source_hash is None:
+            source_hash = self._hash_file(filename)
+        self._write_snapshot(snapshot_path, data, source_stat, source_hash)
+        return data
+    
+    def resync_file(self, filename, snapshot_path=None):
+        """Apply only the INDI/FAM/NOTE records that differ in a new version of the loaded file.
+        
+        The loaded dicts are updated in place. Returns the IDs of changed records and of the
+        individuals whose family links may have changed.
+        """
+        changes = self.apply_diff(self.diff_file(filename))
+        self.write_resync_snapshot(filename, snapshot_path)
+        return changes
+    
+    def diff_file(self, filename):
+        """Read a new version of the loaded file and parse the records that differ; the loaded data is untouched"""
+        new_versions, changed_records = self._read_with_fallback(
+            filename, lambda encoding: self._diff_records(filename, encoding))
+        
+        # Parse just the changed records
+        changed = GedcomParser()
+        for record in changed_records:
+            changed.parse_record(record)
+        return new_versions, changed
+    
+    def apply_diff(self, diff):
+        """Apply the result of diff_file to the loaded dicts in place and return what changed"""
+        new_versions, changed = diff
+        removed = {
+            record_type: set(self.record_versions[record_type]) - set(new_versions[record_type])
+            for record_type in ('INDI', 'FAM', 'NOTE')
+        }
+        changed_family_ids = set(changed.families) | removed['FAM']
+        changed_person_ids = set(changed.individuals) | removed['INDI']
+        changed_note_ids = set(changed.notes) | removed['NOTE']
+        
+        # People whose family links may differ: changed people and old and new family members
+        linked_people = set(changed_person_ids)
+        for family_id in changed_family_ids:
+            for family in (self.families.get(family_id), changed.families.get(family_id)):
+                if family:
+                    linked_people.update(self._family_members(family))
+        
+        # People whose resolved notes may differ
+        note_people = set(changed.individuals)
+        if changed_note_ids:
+            note_references = self._get_note_references()
+            for note_id in changed_note_ids:
+                note_people.update(note_references.get(note_id, ()))
+        
+        # Keep the previous derived family lists and note links before replacing records
+        candidate_families = {}
+        for person_id in linked_people:
+            person = self.individuals.get(person_id, {})
+            candidate_families[person_id] = person.get('families_as_spouse', []) + person.get('families_as_child', [])
+        note_references = self._note_references
+        if note_references is not None:
+            for person_id in note_people:
+                for note in self.individuals.get(person_id, {}).get('notes', []):
+                    if note.get('id') in note_references:
+                        note_references[note['id']].discard(person_id)
+        
+        for person_id in removed['INDI']:
+            self.individuals.pop(person_id, None)
+        for family_id in removed['FAM']:
+            self.families.pop(family_id, None)
+        for note_id in removed['NOTE']:
+            self.notes.pop(note_id, None)
+        self.individuals.update(changed.individuals)
+        self.families.update(changed.families)
+        self.notes.update(changed.notes)
+        self.record_versions = new_versions
+        
+        # A fresh parse lists each person's families in file order
+        family_order = {family_id: index for index, family_id in enumerate(new_versions['FAM'])} if linked_people else {}
+        for person_id in linked_people:
+            if person_id in self.individuals:
+                self._update_family_references(person_id, candidate_families[person_id] + list(changed_family_ids),
+                                               family_order)
+        
+        for person_id in note_people:
+            person = self.individuals.get(person_id)
+            if not person:
+                continue
+            self._resolve_person_notes(person)
+            if note_references is not None:
+                for note in person['notes']:
+                    if note.get('id'):
+                        note_references.setdefault(note['id'], set()).add(person_id)
+        
+        return {
+            'individuals': changed_person_ids,
+            'families': changed_family_ids,
+            'notes': changed_note_ids,
+            'linked_people': linked_people,
+            'note_people': note_people
+        }
+    
+    def write_resync_snapshot(self, filename, snapshot_path=None):
+        """Snapshot the data after a re-sync so the next start doesn't re-parse the file"""
+        if snapshot_path is None:
+            snapshot_path = filename + '.snapshot'
+        self._write_snapshot(snapshot_path, self._plain_family_data(), os.stat(filename), self._hash_file(filename))
+    
+    def _diff_records(self, filename, encoding):
+        """Stream a file and collect the records whose digest differs from the loaded version"""
+        new_versions = {'INDI': {}, 'FAM': {}, 'NOTE': {}}
+        changed_records = []
+        for record in self.iter_records(filename, encoding):
+            header_match = RECORD_HEADER_PATTERN.match(record[0])
+            if not header_match:
+                continue
+            record_id, record_type = header_match.groups()
+            digest = self._record_digest(record)
+            new_versions[record_type][record_id] = digest
+            if self.record_versions[record_type].get(record_id) != digest:
+                changed_records.append(record)
+        return new_versions, changed_records
+    
+    def _family_members(self, family):
+        """IDs of the spouses and children of a family record"""
+        members = [family[role] for role in ('husband', 'wife') if family.get(role)]
+        return members + family.get('children', [])
+    
+    def _update_family_references(self, person_id, candidate_family_ids, family_order):
+        """Recompute families_as_spouse/families_as_child for one person from candidate families"""
+        person = self.individuals[person_id]
+        candidates = set(candidate_family_ids)
+        candidates.update(person.get('spouse_in_families', []))
+        candidates.update(person.get('child_of_families', []))
+        
+        as_spouse = []
+        as_child = []
+        for family_id in sorted(candidates & self.families.keys(), key=family_order.__getitem__):
+            family = self.families[family_id]
+            # Same entries as _add_family_references, including repeated links
+            for role in ('husband', 'wife'):
+                if family.get(role) == person_id:
+                    as_spouse.append(family_id)
+            as_child.extend(family_id for child_id in family.get('children', []) if child_id == person_id)
+        
+        person.pop('families_as_spouse', None)
+        person.pop('families_as_child', None)
+        if as_spouse:
+            person['families_as_spouse'] = as_spouse
+        if as_child:
+            person['families_as_child'] = as_child
+    
+    def _get_note_references(self):
+        """Map each note ID to the individuals referencing it"""
+        if self._note_references is None:
+            self._note_references = {}
+            for person_id, person in self.individuals.items():
+                for note in person.get('notes', []):
+                    if note.get('id'):
+                        self._note_references.setdefault(note['id'], set()).add(person_id)
+        return self._note_references
+    
+    def _read_snapshot(self, snapshot_path):
+        """Read a snapshot file, returning None if it is missing, unreadable or outdated"""
+        try:
+            with open(snapshot_path, 'rb') as file:
+                snapshot = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable GEDCOM snapshot {snapshot_path}: {e}")
+            return None
+        
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            return None
+        return snapshot
+    
+    def _write_snapshot(self, snapshot_path, data, source_stat, source_hash):
+        """Atomically write a snapshot so concurrent workers never read a partial file"""
+        snapshot = {
+            'version': SNAPSHOT_VERSION,
+            'source_size': source_stat.st_size,
+            'source_mtime': source_stat.st_mtime_ns,
+            'source_hash': source_hash,
+            'data': data
+        }
+        
+        try:
+            snapshot_dir = os.path.dirname(os.path.abspath(snapshot_path))
+            fd, temp_path = tempfile.mkstemp(dir=snapshot_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, snapshot_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except Exception as e:
+            # A missing snapshot only costs a re-parse on the next start
+            logging.warning(f"Could not write GEDCOM snapshot {snapshot_path}: {e}")
+    
+    def _load_snapshot_data(self, data):
+        """Adopt parsed data loaded from a snapshot"""
+        self._reset()
+        self.individuals = data['individuals']
+        self.families = data['families']
+        self.notes = data['notes']
+        self.record_versions = data['record_versions']
+        return data
+    
+    def _hash_file(self, filename):
+        """SHA-256 of the raw file contents"""
+        sha256 = hashlib.sha256()
+        with open(filename, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
     def parse_line(self, line):
         """Parse a single GEDCOM line"""
         if not line:
@@ -55,6 +465,9 @@ class GedcomParser:
         
         # Handle record headers (level 0)
         if level == 0:
+            # Lines of records we don't keep (HEAD, SUBM, ...) must not leak into the previous one
+            self.current_record = None
+            self.current_record_type = None
             if tag_or_id.startswith('@') and tag_or_id.endswith('@'):
                 record_id = tag_or_id[1:-1]  # Remove @ symbols
                 record_type = value
@@ -250,20 +663,25 @@ class GedcomParser:
     
     def _resolve_note_references(self):
         """Resolve note references to actual note content"""
-        for person_id, person in self.individuals.items():
-            resolved_notes = []
-            for note in person.get('notes', []):
-                if note['type'] == 'reference' and note['id'] in self.notes:
-                    # Get the referenced note content
-                    referenced_note = self.notes[note['id']]
-                    content = referenced_note['content']
-                    if referenced_note['continuation']:
-                        content += '\n' + '\n'.join(referenced_note['continuation'])
-                    resolved_notes.append({
-                        'type': 'resolved',
-                        'content': content
-                    })
-                elif note['type'] == 'text':
-                    # Direct note text
-                    resolved_notes.append(note)
-            person['notes'] = resolved_notes 
\ No newline at end of file
+        for person in self.individuals.values():
+            self._resolve_person_notes(person)
+    
+    def _resolve_person_notes(self, person):
+        """Resolve the note references of one person, keeping the note ID for later re-syncs"""
+        resolved_notes = []
+        for note in person.get('notes', []):
+            if note['type'] in ('reference', 'resolved') and note.get('id') in self.notes:
+                # Get the referenced note content
+                referenced_note = self.notes[note['id']]
+                content = referenced_note['content']
+                if referenced_note['continuation']:
+                    content += '\n' + '\n'.join(referenced_note['continuation'])
+                resolved_notes.append({
+                    'type': 'resolved',
+                    'id': note['id'],
+                    'content': content
+                })
+            elif note['type'] == 'text':
+                # Direct note text
+                resolved_notes.append(note)
+        person['notes'] = resolved_notes
@@ -1,10 +1,57 @@
+from collections import deque
+from family_graph import FamilyGraph
+
 class GenerationCalculator:
-    def __init__(self, individuals, families):
+    def __init__(self, individuals, families, precompute=False, family_graph=None):
         self.individuals = individuals
         self.families = families
+        # Share the app-wide adjacency index when one is provided
+        self.family_graph = family_graph or FamilyGraph({'individuals': individuals, 'families': families})
         # Use Samuel (1863) as G1 baseline
         self.g1_baseline = "I71243996"  # Samuel - Born: 13 April 1863
         self.generation_cache = {}
+        self.generation_labels = None
+        # People reached from the baseline by the precomputed BFS
+        self.connected_people = set()
+        
+        # Optionally fill the whole table up front so lookups never run a BFS
+        if precompute:
+            self.precompute_generations()
+        
+    def precompute_generations(self):
+        """Run one BFS from the G1 baseline and store a generation for every individual"""
+        generations = {}
+        
+        if self.g1_baseline in self.individuals:
+            # Child edges add a generation and parent edges remove one, over the integer graph
+            for person_id, offset in self.family_graph.generation_offsets(self.g1_baseline).items():
+                generations[person_id] = 1 + offset
+        
+        self.connected_people = set(generations)
+        
+        # Disconnected people fall back to the birth year estimate
+        for person_id in self.individuals:
+            if person_id not in generations:
+                generations[person_id] = self._estimate_generation_by_birth_year(person_id)
+        
+        self.generation_cache = generations
+        self.generation_labels = {
+            person_id: self._format_generation_label(generation)
+            for person_id, generation in generations.items()
+        }
+        
+    def refresh_people(self, person_ids):
+        """Update the entries of people whose records changed without changing any family links"""
+        for person_id in person_ids:
+            if self.generation_labels is None or person_id not in self.individuals:
+                self.generation_cache.pop(person_id, None)
+                if self.generation_labels is not None:
+                    self.generation_labels.pop(person_id, None)
+            elif person_id not in self.connected_people:
+                # Only the birth year estimate depends on the person's own record
+                generation = self._estimate_generation_by_birth_year(person_id)
+                self.generation_cache[person_id] = generation
+                self.generation_labels[person_id] = self._format_generation_label(generation)
         
     def calculate_generation(self, person_id):
         """Calculate generation number for a person relative to G1 baseline"""
@@ -26,18 +73,13 @@ class GenerationCalculator:
             return 1
         
         visited = set()
-        queue = [(self.g1_baseline, 1)]  # (person_id, generation)
+        queue = deque([(self.g1_baseline, 1)])  # (person_id, generation)
         visited.add(self.g1_baseline)
         
-        # Build a graph of all connections
-        connections = {}
-        for person_id in self.individuals:
-            connections[person_id] = self._get_connected_people(person_id)
-        
         while queue:
-            current_person_id, current_generation = queue.pop(0)
+            current_person_id, current_generation = queue.popleft()
             
-            for connected_person_id in connections.get(current_person_id, set()):
+            for connected_person_id in self._get_connected_people(current_person_id):
                 if connected_person_id in visited:
                     continue
                 
@@ -63,71 +105,11 @@ class GenerationCalculator:
     
     def _get_connected_people(self, person_id):
         """Get all people directly connected to this person"""
-        connected = set()
-        person = self.individuals.get(person_id, {})
-        
-        # Get parents and siblings through child_of_families
-        for family_id in person.get('child_of_families', []):
-            family = self.families.get(family_id, {})
-            
-            # Add parents
-            if family.get('husband'):
-                connected.add(family['husband'])
-            if family.get('wife'):
-                connected.add(family['wife'])
-            
-            # Add siblings
-            for child_id in family.get('children', []):
-                if child_id != person_id:
-                    connected.add(child_id)
-        
-        # Get spouses and children through spouse_in_families
-        for family_id in person.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            
-            # Add spouse
-            if family.get('husband') == person_id and family.get('wife'):
-                connected.add(family['wife'])
-            elif family.get('wife') == person_id and family.get('husband'):
-                connected.add(family['husband'])
-            
-            # Add children
-            for child_id in family.get('children', []):
-                connected.add(child_id)
-        
-        return connected
+        return self.family_graph.get_connected(person_id)
     
     def _get_relationship_type(self, person1_id, person2_id):
         """Determine the type of relationship between two people"""
-        person1 = self.individuals.get(person1_id, {})
-        person2 = self.individuals.get(person2_id, {})
-        
-        # Check if person2 is a child of person1
-        for family_id in person1.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            if person2_id in family.get('children', []):
-                return 'child'
-        
-        # Check if person1 is a child of person2
-        for family_id in person2.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            if person1_id in family.get('children', []):
-                return 'parent'
-        
-        # Check if they are spouses
-        for family_id in person1.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            if (family.get('husband') == person1_id and family.get('wife') == person2_id) or \
-               (family.get('wife') == person1_id and family.get('husband') == person2_id):
-                return 'spouse'
-        
-        # Check if they are siblings
-        for family_id in person1.get('child_of_families', []):
-            family = self.families.get(family_id, {})
-            if person2_id in family.get('children', []):
-                return 'sibling'
-        
-        return 'unknown'
+        return self.family_graph.get_edge_type(person1_id, person2_id) or 'unknown'
     
     def _estimate_generation_by_birth_year(self, person_id):
         """Estimate generation based on birth year if no family connection found"""
@@ -149,7 +131,12 @@ class GenerationCalculator:
     
     def get_generation_label(self, person_id):
         """Get the generation label (G1, G2, etc.) for a person"""
-        generation = self.calculate_generation(person_id)
+        if self.generation_labels is not None and person_id in self.generation_labels:
+            return self.generation_labels[person_id]
+        return self._format_generation_label(self.calculate_generation(person_id))
+    
+    def _format_generation_label(self, generation):
+        """Format a generation number as a label"""
         if generation is None:
             return "G?"
         return f"G{generation}"
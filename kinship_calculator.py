@@ -0,0 +1,179 @@
+ORDINALS = ['First', 'Second', 'Third', 'Fourth', 'Fifth', 'Sixth', 'Seventh', 'Eighth', 'Ninth', 'Tenth']
+REMOVALS = ['Once', 'Twice', 'Thrice']
+
+class KinshipCalculator:
+    """Blood relationships from lowest common ancestors over the ancestor DAG"""
+
+    def __init__(self, individuals, family_graph):
+        self.individuals = individuals
+        self.family_graph = family_graph
+        # person_id -> {ancestor_id: generations up}, including the person at depth 0
+        self.ancestor_depths = {}
+        self.build()
+
+    def build(self):
+        """Precompute the ancestor depth map of every individual"""
+        self.ancestor_depths = {}
+        for person_id in self.individuals:
+            self._compute_ancestor_depths(person_id)
+
+    def invalidate(self, person_ids):
+        """Recompute the depth maps of people whose parents changed, and of all their descendants"""
+        stale = set()
+        stack = list(person_ids)
+        while stack:
+            person_id = stack.pop()
+            if person_id in stale:
+                continue
+            stale.add(person_id)
+            stack.extend(self.family_graph.get_children(person_id))
+
+        for person_id in stale:
+            self.ancestor_depths.pop(person_id, None)
+        for person_id in stale:
+            if person_id in self.individuals:
+                self._compute_ancestor_depths(person_id)
+
+    def _compute_ancestor_depths(self, person_id):
+        """Fill the ancestor depth maps of a person and all of their ancestors"""
+        if person_id in self.ancestor_depths:
+            return self.ancestor_depths[person_id]
+
+        # Iterative post-order walk so deep pedigrees don't hit the recursion limit
+        in_progress = set()
+        stack = [person_id]
+        while stack:
+            current_id = stack[-1]
+            if current_id in self.ancestor_depths:
+                stack.pop()
+                continue
+
+            pending = [parent_id for parent_id in self.family_graph.get_parents(current_id)
+                       if parent_id not in self.ancestor_depths and parent_id not in in_progress]
+            if current_id not in in_progress and pending:
+                in_progress.add(current_id)
+                stack.extend(pending)
+                continue
+
+            depths = {current_id: 0}
+            for parent_id in self.family_graph.get_parents(current_id):
+                # A parent still in progress means the data has a cycle; skip that link
+                for ancestor_id, depth in self.ancestor_depths.get(parent_id, {}).items():
+                    if depth + 1 < depths.get(ancestor_id, depth + 2):
+                        depths[ancestor_id] = depth + 1
+            self.ancestor_depths[current_id] = depths
+            in_progress.discard(current_id)
+            stack.pop()
+
+        return self.ancestor_depths[person_id]
+
+    def find_lowest_common_ancestors(self, person1_id, person2_id):
+        """Find the closest common ancestors and their distances (ancestors, depth1, depth2)"""
+        depths1 = self.ancestor_depths.get(person1_id)
+        depths2 = self.ancestor_depths.get(person2_id)
+        if not depths1 or not depths2:
+            return [], None, None
+
+        # Walk the smaller map and probe the larger one
+        swapped = len(depths1) > len(depths2)
+        if swapped:
+            depths1, depths2 = depths2, depths1
+
+        best_key = None
+        ancestors = []
+        for ancestor_id, depth1 in depths1.items():
+            depth2 = depths2.get(ancestor_id)
+            if depth2 is None:
+                continue
+            key = (depth1 + depth2, abs(depth1 - depth2))
+            if best_key is None or key < best_key:
+                best_key = key
+                ancestors = [(ancestor_id, depth1, depth2)]
+            elif key == best_key:
+                ancestors.append((ancestor_id, depth1, depth2))
+
+        if not ancestors:
+            return [], None, None
+
+        _, depth1, depth2 = ancestors[0]
+        if swapped:
+            depth1, depth2 = depth2, depth1
+        return [ancestor_id for ancestor_id, _, _ in ancestors], depth1, depth2
+
+    def get_kinship_label(self, person1_id, person2_id):
+        """Get what person2 is to person1 by blood, or None if they share no ancestor"""
+        ancestors, depth1, depth2 = self.find_lowest_common_ancestors(person1_id, person2_id)
+        if not ancestors:
+            return None
+        return self.label_for_depths(depth1, depth2, self.individuals.get(person2_id, {}).get('sex', 'U'))
+
+    def label_for_depths(self, depth1, depth2, sex='U'):
+        """Label a blood relationship from the generations up to the common ancestor on each side"""
+        if depth1 == 0 and depth2 == 0:
+            return "Self"
+
+        # Direct line: person2 is a descendant of person1
+        if depth1 == 0:
+            if depth2 == 1:
+                return self._gendered(sex, "Son", "Daughter", "Child")
+            return self._greats(depth2 - 2) + self._gendered(sex, "Grandson", "Granddaughter", "Grandchild")
+
+        # Direct line: person2 is an ancestor of person1
+        if depth2 == 0:
+            if depth1 == 1:
+                return self._gendered(sex, "Father", "Mother", "Parent")
+            return self._greats(depth1 - 2) + self._gendered(sex, "Grandfather", "Grandmother", "Grandparent")
+
+        if depth1 == 1 and depth2 == 1:
+            return self._gendered(sex, "Brother", "Sister", "Sibling")
+
+        # person2 is a sibling of one of person1's ancestors
+        if depth2 == 1:
+            return self._greats(depth1 - 2) + self._gendered(sex, "Uncle", "Aunt", "Uncle/Aunt")
+
+        # person2 descends from one of person1's siblings
+        if depth1 == 1:
+            return self._greats(depth2 - 2) + self._gendered(sex, "Nephew", "Niece", "Niece/Nephew")
+
+        degree = min(depth1, depth2) - 1
+        removed = abs(depth1 - depth2)
+        label = f"{self._ordinal(degree)} Cousin"
+        if removed:
+            label += f" {self._removal(removed)} Removed"
+        return label
+
+    def _gendered(self, sex, male, female, neutral):
+        """Pick the gendered form of a label"""
+        if sex == 'M':
+            return male
+        elif sex == 'F':
+            return female
+        return neutral
+
+    def _greats(self, count):
+        """Prefix for the number of 'great' generations"""
+        if count <= 0:
+            return ""
+        if count <= 2:
+            return "Great-" * count
+        return f"{count}x Great-"
+
+    def _ordinal(self, number):
+        """Spell out a cousin degree"""
+        if number <= len(ORDINALS):
+            return ORDINALS[number - 1]
+        if number % 100 in (11, 12, 13):
+            return f"{number}th"
+        if number % 10 == 1:
+            return f"{number}st"
+        if number % 10 == 2:
+            return f"{number}nd"
+        if number % 10 == 3:
+            return f"{number}rd"
+        return f"{number}th"
+
+    def _removal(self, number):
+        """Spell out how many times a cousin is removed"""
+        if number <= len(REMOVALS):
+            return REMOVALS[number - 1]
+        return f"{number} Times"
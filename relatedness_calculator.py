@@ -0,0 +1,207 @@
+import threading
+from collections import OrderedDict
+
+class RelatednessCalculator:
+    """Kinship coefficients over the pedigree, computed in topological (generation) order"""
+
+    def __init__(self, individuals, family_graph, cache_size=32):
+        self.individuals = individuals
+        self.family_graph = family_graph
+        # Parents come before their children in this order; a re-sync moves changed people to the end,
+        # so order_index only keeps the relative order and is not a position in the list
+        self.topological_order = []
+        self.order_index = {}
+        self.next_order_index = 0
+        self.birth_parents = {}
+        # LRU cache of reference person -> {person_id: kinship coefficient}
+        self.kinship_cache = OrderedDict()
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self.build()
+
+    def build(self):
+        """Order everyone parents-first"""
+        self.birth_parents = {person_id: self._get_birth_parents(person_id) for person_id in self.individuals}
+        self.topological_order = self._order_parents_first(list(self.birth_parents))
+        self.order_index = {person_id: index for index, person_id in enumerate(self.topological_order)}
+        self.next_order_index = len(self.topological_order)
+        self.clear_cache()
+
+    def update_people(self, person_ids, relinked_people):
+        """Re-place people whose parents changed, or who were added or removed, and all of their descendants"""
+        stale = set()
+        stack = list(relinked_people)
+        stack.extend(person_id for person_id in person_ids
+                     if (person_id in self.individuals) != (person_id in self.order_index))
+        while stack:
+            person_id = stack.pop()
+            if person_id in stale:
+                continue
+            stale.add(person_id)
+            stack.extend(self.family_graph.get_children(person_id))
+        if not stale:
+            return
+
+        for person_id in stale:
+            self.birth_parents.pop(person_id, None)
+            self.order_index.pop(person_id, None)
+        present = [person_id for person_id in sorted(stale) if person_id in self.individuals]
+        for person_id in present:
+            self.birth_parents[person_id] = self._get_birth_parents(person_id)
+
+        # Everyone else keeps their place: their parents can't be stale, or they would be stale too
+        order = self._order_parents_first(present)
+        self.topological_order = [person_id for person_id in self.topological_order if person_id not in stale] + order
+        for person_id in order:
+            self.order_index[person_id] = self.next_order_index
+            self.next_order_index += 1
+
+        with self._cache_lock:
+            for reference_id, row in list(self.kinship_cache.items()):
+                if reference_id in stale:
+                    del self.kinship_cache[reference_id]
+                    continue
+                # The reference's ancestors aren't stale, so only the inherited entries of stale people change
+                for person_id in stale:
+                    row.pop(person_id, None)
+                for person_id in order:
+                    coefficient = sum(row.get(parent_id, 0.0) for parent_id in self.birth_parents[person_id])
+                    if coefficient:
+                        row[person_id] = coefficient / 2
+
+    def _get_birth_parents(self, person_id):
+        """Only the first two parent links (the birth family) count toward shared DNA"""
+        return [parent_id for parent_id in self.family_graph.get_parents(person_id)[:2]
+                if parent_id in self.individuals]
+
+    def _order_parents_first(self, person_ids):
+        """Kahn's algorithm over the parent links among these people; people caught in a cycle of bad data come last"""
+        people = set(person_ids)
+        pending_parents = {}
+        children = {}
+        for person_id in person_ids:
+            parents = [parent_id for parent_id in self.birth_parents[person_id] if parent_id in people]
+            pending_parents[person_id] = len(parents)
+            for parent_id in parents:
+                children.setdefault(parent_id, []).append(person_id)
+
+        order = [person_id for person_id in person_ids if pending_parents[person_id] == 0]
+        for person_id in order:
+            for child_id in children.get(person_id, []):
+                pending_parents[child_id] -= 1
+                if pending_parents[child_id] == 0:
+                    order.append(child_id)
+        if len(order) < len(person_ids):
+            placed = set(order)
+            order.extend(person_id for person_id in person_ids if person_id not in placed)
+        return order
+
+    def clear_cache(self):
+        """Drop all cached kinship rows"""
+        with self._cache_lock:
+            self.kinship_cache.clear()
+
+    def get_kinship_row(self, reference_id):
+        """Kinship coefficient of every related person to the reference person (LRU cached)"""
+        with self._cache_lock:
+            if reference_id in self.kinship_cache:
+                self.kinship_cache.move_to_end(reference_id)
+                return self.kinship_cache[reference_id]
+
+        row = self._compute_kinship_row(reference_id, {})
+
+        with self._cache_lock:
+            self.kinship_cache[reference_id] = row
+            self.kinship_cache.move_to_end(reference_id)
+            while len(self.kinship_cache) > self.cache_size:
+                self.kinship_cache.popitem(last=False)
+        return row
+
+    def get_relatedness(self, reference_id):
+        """Expected percentage of shared DNA between the reference person and everyone related to them"""
+        return {person_id: self.coefficient_to_percent(coefficient)
+                for person_id, coefficient in self.get_kinship_row(reference_id).items()
+                if person_id != reference_id}
+
+    def get_shared_dna_percent(self, reference_id, person_id):
+        """Expected percentage of shared DNA between two people"""
+        if reference_id == person_id:
+            return 100.0
+        return self.coefficient_to_percent(self.get_kinship_row(reference_id).get(person_id, 0.0))
+
+    def coefficient_to_percent(self, coefficient):
+        """Relatedness (twice the kinship coefficient) as a rounded percentage"""
+        return round(200 * coefficient, 4)
+
+    def iter_kinship_rows(self, person_ids=None, block_size=64):
+        """All-vs-all kinship, yielding (person_id, row) block by block"""
+        # People in a block share one table of ancestor-pair coefficients, dropped between blocks to bound memory
+        person_ids = list(self.topological_order if person_ids is None else person_ids)
+        for start in range(0, len(person_ids), block_size):
+            pair_kinship = {}
+            for person_id in person_ids[start:start + block_size]:
+                yield person_id, self._compute_kinship_row(person_id, pair_kinship)
+
+    def kinship(self, person1_id, person2_id):
+        """Kinship coefficient of a single pair"""
+        return self._pair_kinship(person1_id, person2_id, {})
+
+    def _compute_kinship_row(self, reference_id, pair_kinship):
+        """One-vs-all kinship as a sparse {person_id: coefficient} dict of the non-zero entries"""
+        if reference_id not in self.order_index:
+            return {}
+
+        # Ancestors of the reference (and the reference) need the pairwise recursion
+        lineage = self._ancestors_of(reference_id)
+        row = {}
+        for person_id in lineage:
+            coefficient = self._pair_kinship(reference_id, person_id, pair_kinship)
+            if coefficient:
+                row[person_id] = coefficient
+
+        # Everyone else inherits half of what each parent shares with the reference
+        for person_id in self.topological_order:
+            if person_id in lineage:
+                continue
+            coefficient = 0.0
+            for parent_id in self.birth_parents[person_id]:
+                coefficient += row.get(parent_id, 0.0)
+            if coefficient:
+                row[person_id] = coefficient / 2
+        return row
+
+    def _ancestors_of(self, person_id):
+        """The person and all of their birth-family ancestors"""
+        lineage = {person_id}
+        stack = [person_id]
+        while stack:
+            for parent_id in self.birth_parents.get(stack.pop(), []):
+                if parent_id not in lineage:
+                    lineage.add(parent_id)
+                    stack.append(parent_id)
+        return lineage
+
+    def _pair_kinship(self, person1_id, person2_id, pair_kinship):
+        """Memoized kinship recursion, always expanding the person later in topological order"""
+        if person1_id not in self.order_index or person2_id not in self.order_index:
+            return 0.0
+
+        key = (person1_id, person2_id) if self.order_index[person1_id] >= self.order_index[person2_id] else (person2_id, person1_id)
+        if key in pair_kinship:
+            return pair_kinship[key]
+
+        # A link back into a pair still being computed means the data has a cycle; it counts as unrelated
+        pair_kinship[key] = 0.0
+        later_id, earlier_id = key
+        parents = self.birth_parents[later_id]
+        if later_id == earlier_id:
+            # Self-kinship is 1/2 plus half the kinship of the two parents (inbreeding)
+            coefficient = 0.5
+            if len(parents) == 2:
+                coefficient += self._pair_kinship(parents[0], parents[1], pair_kinship) / 2
+        else:
+            # The later person can't be an ancestor of the earlier one, so expand its parents
+            coefficient = sum(self._pair_kinship(parent_id, earlier_id, pair_kinship)
+                              for parent_id in parents) / 2
+        pair_kinship[key] = coefficient
+        return coefficient
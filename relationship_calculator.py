@@ -1,9 +1,23 @@
-from collections import deque
+import threading
+from collections import OrderedDict
+from family_graph import FamilyGraph
+from kinship_calculator import KinshipCalculator
 
 class RelationshipCalculator:
-    def __init__(self, family_data):
+    def __init__(self, family_data, family_graph=None, relationship_cache_size=32, lineage_cache_size=256):
         self.individuals = family_data['individuals']
         self.families = family_data['families']
+        # Share the app-wide adjacency index when one is provided
+        self.family_graph = family_graph or FamilyGraph(family_data)
+        # Ancestor depth maps for exact blood relationship labels
+        self.kinship_calc = KinshipCalculator(self.individuals, self.family_graph)
+        # LRU cache of reference person -> (BFS tree, {person_id: relationship})
+        self.relationship_cache = OrderedDict()
+        self.relationship_cache_size = relationship_cache_size
+        self._cache_lock = threading.Lock()
+        # LRU cache of (person_id, ancestors?) -> (generations covered, {relative_id: [generations]})
+        self.lineage_cache = OrderedDict()
+        self.lineage_cache_size = lineage_cache_size
         
     def calculate_relationship(self, person1_id, person2_id):
         """Calculate the relationship between two people"""
@@ -21,84 +35,177 @@ class RelationshipCalculator:
         
         return self._interpret_relationship_path(path, person1_id, person2_id)
     
+    def get_relationship(self, reference_id, person_id):
+        """Get a relationship from the cached map of the reference person"""
+        if reference_id not in self.individuals or person_id not in self.individuals:
+            return self.calculate_relationship(reference_id, person_id)
+        return self.get_relationships_from(reference_id)[person_id]
+    
+    def get_relationships_from(self, reference_id):
+        """Get the relationship of every individual to the reference person (LRU cached)"""
+        with self._cache_lock:
+            if reference_id in self.relationship_cache:
+                self.relationship_cache.move_to_end(reference_id)
+                return self.relationship_cache[reference_id][1]
+        
+        tree, relationships = self._label_everyone(reference_id)
+        
+        with self._cache_lock:
+            self.relationship_cache[reference_id] = (tree, relationships)
+            self.relationship_cache.move_to_end(reference_id)
+            while len(self.relationship_cache) > self.relationship_cache_size:
+                self.relationship_cache.popitem(last=False)
+        
+        return relationships
+    
+    def clear_relationship_cache(self):
+        """Drop all cached relationship maps"""
+        with self._cache_lock:
+            self.relationship_cache.clear()
+    
+    def refresh_people(self, person_ids):
+        """Relabel people whose records changed in every cached map; only valid while no family links changed"""
+        with self._cache_lock:
+            cached = list(self.relationship_cache.items())
+        
+        for reference_id, (tree, relationships) in cached:
+            # A reference person who was added or removed changes the whole map
+            if (tree is None) != (reference_id not in self.individuals):
+                with self._cache_lock:
+                    self.relationship_cache.pop(reference_id, None)
+                continue
+            # Without new links the BFS tree still holds, and only a person's own record feeds their label
+            for person_id in person_ids:
+                if person_id in self.individuals:
+                    relationships[person_id] = self._label_from_tree(tree, reference_id, person_id)
+                else:
+                    relationships.pop(person_id, None)
+    
+    def clear_lineage_cache(self):
+        """Drop all cached ancestor and descendant maps"""
+        with self._cache_lock:
+            self.lineage_cache.clear()
+    
+    def invalidate_lineage(self, person_ids):
+        """Drop the cached ancestor and descendant maps that reach a person whose family links changed"""
+        person_ids = set(person_ids)
+        with self._cache_lock:
+            for key, (_, depths) in list(self.lineage_cache.items()):
+                if key[0] in person_ids or not person_ids.isdisjoint(depths):
+                    del self.lineage_cache[key]
+    
+    def calculate_all_relationships(self, reference_id):
+        """Label every individual relative to the reference person with a single BFS"""
+        return self._label_everyone(reference_id)[1]
+    
+    def _label_everyone(self, reference_id):
+        """Label every individual from one BFS; returns (BFS tree, {person_id: relationship})"""
+        if reference_id not in self.individuals:
+            return None, {person_id: "Unknown relationship" for person_id in self.individuals}
+        
+        # BFS tree over the integer graph; each path and its edge types are rebuilt from it when labelled
+        tree = self.family_graph.bfs_tree(reference_id)
+        relationships = {person_id: self._label_from_tree(tree, reference_id, person_id)
+                         for person_id in self.individuals}
+        return tree, relationships
+    
+    def _label_from_tree(self, tree, reference_id, person_id):
+        """Label one person from the BFS tree of the reference person"""
+        if person_id == reference_id:
+            return "Self"
+        path, edge_types = self.family_graph.path_to(tree, person_id)
+        if path is None:
+            return "No known relationship"
+        return self._interpret_relationship_path(path, reference_id, person_id, edge_types)
+    
     def _find_path(self, start_id, target_id):
-        """Find the shortest path between two people using BFS"""
+        """Find the shortest path between two people using bidirectional BFS"""
         if start_id == target_id:
             return [start_id]
         
-        visited = set()
-        queue = deque([(start_id, [start_id])])
-        
-        while queue:
-            current_id, path = queue.popleft()
-            
-            if current_id in visited:
-                continue
-            
-            visited.add(current_id)
-            
-            # Get all connected people (parents, children, spouses)
-            connected_people = self._get_connected_people(current_id)
+        graph = self.family_graph
+        start = graph.person_index.get(start_id)
+        target = graph.person_index.get(target_id)
+        if start is None or target is None:
+            return None
+        
+        # Each side keeps parent pointers between integer nodes; the path is only rebuilt where the searches meet
+        forward_parents = {start: None}
+        backward_parents = {target: None}
+        forward_frontier = [start]
+        backward_frontier = [target]
+        
+        while forward_frontier and backward_frontier:
+            # Expand the smaller frontier by one full level
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting_id = self._expand_frontier(
+                    forward_frontier, forward_parents, backward_parents)
+            else:
+                backward_frontier, meeting_id = self._expand_frontier(
+                    backward_frontier, backward_parents, forward_parents)
             
-            for connected_id in connected_people:
-                if connected_id == target_id:
-                    return path + [connected_id]
-                
-                if connected_id not in visited:
-                    queue.append((connected_id, path + [connected_id]))
+            if meeting_id is not None:
+                return self._build_path(meeting_id, forward_parents, backward_parents)
         
         return None
     
+    def _expand_frontier(self, frontier, parents, other_parents):
+        """Expand one BFS level, returning the next frontier and the first meeting point"""
+        next_frontier = []
+        
+        for current in frontier:
+            for connected in self.family_graph.neighbor_nodes(current):
+                if connected in parents:
+                    continue
+                
+                parents[connected] = current
+                
+                # Family links are symmetric, so the first meeting lies on a shortest path
+                if connected in other_parents:
+                    return next_frontier, connected
+                
+                next_frontier.append(connected)
+        
+        return next_frontier, None
+    
+    def _build_path(self, meeting, forward_parents, backward_parents):
+        """Rebuild the start-to-target path of person IDs through the meeting node"""
+        path = []
+        current = meeting
+        while current is not None:
+            path.append(current)
+            current = forward_parents[current]
+        path.reverse()
+        
+        current = backward_parents[meeting]
+        while current is not None:
+            path.append(current)
+            current = backward_parents[current]
+        
+        return [self.family_graph.person_ids[node] for node in path]
+    
     def _get_connected_people(self, person_id):
         """Get all people directly connected to this person"""
-        connected = set()
-        person = self.individuals.get(person_id, {})
-        
-        # Get parents and siblings through child_of_families
-        for family_id in person.get('child_of_families', []):
-            family = self.families.get(family_id, {})
-            
-            # Add parents
-            if family.get('husband'):
-                connected.add(family['husband'])
-            if family.get('wife'):
-                connected.add(family['wife'])
-            
-            # Add siblings
-            for child_id in family.get('children', []):
-                if child_id != person_id:
-                    connected.add(child_id)
-        
-        # Get spouses and children through spouse_in_families
-        for family_id in person.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            
-            # Add spouse
-            if family.get('husband') == person_id and family.get('wife'):
-                connected.add(family['wife'])
-            elif family.get('wife') == person_id and family.get('husband'):
-                connected.add(family['husband'])
-            
-            # Add children
-            for child_id in family.get('children', []):
-                connected.add(child_id)
-        
-        return connected
+        return self.family_graph.get_connected(person_id)
     
-    def _interpret_relationship_path(self, path, person1_id, person2_id):
+    def _interpret_relationship_path(self, path, person1_id, person2_id, edge_types=None):
         """Interpret a relationship path to generate a relationship description"""
         if len(path) < 2:
             return "Unknown relationship"
         
+        # Edge type of each step along the path, unless the BFS already recorded them
+        if edge_types is None:
+            edge_types = [self.family_graph.get_edge_type(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        
         # Simple direct relationships
         if len(path) == 2:
-            return self._get_direct_relationship(person1_id, person2_id)
+            return self._get_direct_relationship(person1_id, person2_id, edge_types[0])
         
         # For longer paths, try to determine the relationship type
         if len(path) == 3:
             middle_person = path[1]
-            rel1 = self._get_direct_relationship(person1_id, middle_person)
-            rel2 = self._get_direct_relationship(middle_person, person2_id)
+            rel1 = self._get_direct_relationship(person1_id, middle_person, edge_types[0])
+            rel2 = self._get_direct_relationship(middle_person, person2_id, edge_types[1])
             
             # Sibling relationships
             if rel1 in ["Child", "Son", "Daughter"] and rel2 in ["Child", "Son", "Daughter"]:
@@ -136,9 +243,9 @@ class RelationshipCalculator:
         if len(path) == 4:
             middle1 = path[1]
             middle2 = path[2]
-            rel1 = self._get_direct_relationship(person1_id, middle1)
-            rel2 = self._get_direct_relationship(middle1, middle2)
-            rel3 = self._get_direct_relationship(middle2, person2_id)
+            rel1 = self._get_direct_relationship(person1_id, middle1, edge_types[0])
+            rel2 = self._get_direct_relationship(middle1, middle2, edge_types[1])
+            rel3 = self._get_direct_relationship(middle2, person2_id, edge_types[2])
             
             # Spouse's grandparents (spouse -> parent -> parent)
             if (rel1 == "Spouse" and 
@@ -181,10 +288,10 @@ class RelationshipCalculator:
             middle1 = path[1]
             middle2 = path[2]
             middle3 = path[3]
-            rel1 = self._get_direct_relationship(person1_id, middle1)
-            rel2 = self._get_direct_relationship(middle1, middle2)
-            rel3 = self._get_direct_relationship(middle2, middle3)
-            rel4 = self._get_direct_relationship(middle3, person2_id)
+            rel1 = self._get_direct_relationship(person1_id, middle1, edge_types[0])
+            rel2 = self._get_direct_relationship(middle1, middle2, edge_types[1])
+            rel3 = self._get_direct_relationship(middle2, middle3, edge_types[2])
+            rel4 = self._get_direct_relationship(middle3, person2_id, edge_types[3])
             
             # Spouse's sibling's spouse's sibling (spouse -> sibling -> spouse -> sibling)
             if (rel1 == "Spouse" and 
@@ -200,12 +307,17 @@ class RelationshipCalculator:
                 rel4 == "Spouse"):
                 return self._get_child_in_law_relationship(person2_id)
         
+        # Blood relatives get an exact label from their lowest common ancestors
+        kinship_label = self.kinship_calc.get_kinship_label(person1_id, person2_id)
+        if kinship_label:
+            return kinship_label
+        
         # For complex relationships, provide a general description
         generations_up = 0
         generations_down = 0
         
         for i in range(len(path) - 1):
-            rel = self._get_direct_relationship(path[i], path[i + 1])
+            rel = self._get_direct_relationship(path[i], path[i + 1], edge_types[i])
             if rel in ["Parent", "Father", "Mother"]:
                 generations_up += 1
             elif rel in ["Child", "Son", "Daughter"]:
@@ -235,112 +347,95 @@ class RelationshipCalculator:
             else:
                 return "Related"
     
-    def _get_direct_relationship(self, person1_id, person2_id):
+    def _get_direct_relationship(self, person1_id, person2_id, edge_type=None):
         """Get the direct relationship between two people (parent/child/spouse/sibling)"""
-        person1 = self.individuals.get(person1_id, {})
-        person2 = self.individuals.get(person2_id, {})
+        if edge_type is None:
+            edge_type = self.family_graph.get_edge_type(person1_id, person2_id)
+        person2_sex = self.individuals.get(person2_id, {}).get('sex', 'U')
         
         # Check if person2 is a child of person1
-        for family_id in person1.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            if person2_id in family.get('children', []):
-                person2_sex = person2.get('sex', 'U')
-                if person2_sex == 'M':
-                    return "Son"
-                elif person2_sex == 'F':
-                    return "Daughter"
-                else:
-                    return "Child"
+        if edge_type == FamilyGraph.CHILD:
+            if person2_sex == 'M':
+                return "Son"
+            elif person2_sex == 'F':
+                return "Daughter"
+            else:
+                return "Child"
         
         # Check if person1 is a child of person2
-        for family_id in person2.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            if person1_id in family.get('children', []):
-                person2_sex = person2.get('sex', 'U')
-                if person2_sex == 'M':
-                    return "Father"
-                elif person2_sex == 'F':
-                    return "Mother"
-                else:
-                    return "Parent"
+        if edge_type == FamilyGraph.PARENT:
+            if person2_sex == 'M':
+                return "Father"
+            elif person2_sex == 'F':
+                return "Mother"
+            else:
+                return "Parent"
         
         # Check if they are spouses
-        for family_id in person1.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            if (family.get('husband') == person1_id and family.get('wife') == person2_id) or \
-               (family.get('wife') == person1_id and family.get('husband') == person2_id):
-                return "Spouse"
+        if edge_type == FamilyGraph.SPOUSE:
+            return "Spouse"
         
         # Check if they are siblings
-        for family_id in person1.get('child_of_families', []):
-            family = self.families.get(family_id, {})
-            if person2_id in family.get('children', []):
-                return "Sibling"
+        if edge_type == FamilyGraph.SIBLING:
+            return "Sibling"
         
         return "Related"
     
     def get_ancestors(self, person_id, generations=3):
-        """Get ancestors of a person up to specified generations"""
-        ancestors = []
-        current_generation = [person_id]
-        
-        for gen in range(generations):
-            next_generation = []
-            for person in current_generation:
-                parents = self._get_parents(person)
-                next_generation.extend(parents)
-                if parents:
-                    ancestors.extend([(parent, gen + 1) for parent in parents])
-            
-            if not next_generation:
-                break
-            current_generation = next_generation
-        
-        return ancestors
+        """Get ancestors of a person up to specified generations, as (ancestor_id, generation) pairs"""
+        return list(self.iter_ancestors(person_id, generations))
     
     def get_descendants(self, person_id, generations=3):
-        """Get descendants of a person up to specified generations"""
-        descendants = []
-        current_generation = [person_id]
-        
-        for gen in range(generations):
-            next_generation = []
-            for person in current_generation:
-                children = self._get_children(person)
-                next_generation.extend(children)
-                if children:
-                    descendants.extend([(child, gen + 1) for child in children])
-            
-            if not next_generation:
-                break
-            current_generation = next_generation
-        
-        return descendants
+        """Get descendants of a person up to specified generations, as (descendant_id, generation) pairs"""
+        return list(self.iter_descendants(person_id, generations))
+    
+    def iter_ancestors(self, person_id, generations=3):
+        """Yield each ancestor once per generation it appears at, nearest first"""
+        return self.family_graph.iter_lineage(person_id, generations, ancestors=True)
+    
+    def iter_descendants(self, person_id, generations=3):
+        """Yield each descendant once per generation it appears at, nearest first"""
+        return self.family_graph.iter_lineage(person_id, generations, ancestors=False)
+    
+    def get_ancestor_depths(self, person_id, generations=3):
+        """Map each distinct ancestor to every generation it appears at (pedigree collapse shows several)"""
+        return self._get_lineage_depths(person_id, generations, True)
+    
+    def get_descendant_depths(self, person_id, generations=3):
+        """Map each distinct descendant to every generation it appears at"""
+        return self._get_lineage_depths(person_id, generations, False)
+    
+    def _get_lineage_depths(self, person_id, generations, ancestors):
+        """Memoized lineage map; an entry computed for more generations also serves shallower requests"""
+        key = (person_id, ancestors)
+        with self._cache_lock:
+            cached = self.lineage_cache.get(key)
+            if cached is not None and cached[0] >= generations:
+                self.lineage_cache.move_to_end(key)
+                covered, depths = cached
+                if covered == generations:
+                    return depths
+                return {relative_id: [generation for generation in relative_depths if generation <= generations]
+                        for relative_id, relative_depths in depths.items() if relative_depths[0] <= generations}
+        
+        depths = {}
+        for relative_id, generation in self.family_graph.iter_lineage(person_id, generations, ancestors):
+            depths.setdefault(relative_id, []).append(generation)
+        
+        with self._cache_lock:
+            self.lineage_cache[key] = (generations, depths)
+            self.lineage_cache.move_to_end(key)
+            while len(self.lineage_cache) > self.lineage_cache_size:
+                self.lineage_cache.popitem(last=False)
+        return depths
     
     def _get_parents(self, person_id):
         """Get the parents of a person"""
-        parents = []
-        person = self.individuals.get(person_id, {})
-        
-        for family_id in person.get('child_of_families', []):
-            family = self.families.get(family_id, {})
-            if family.get('husband'):
-                parents.append(family['husband'])
-            if family.get('wife'):
-                parents.append(family['wife'])
-        
-        return parents
+        return list(self.family_graph.get_parents(person_id))
     
     def _get_children(self, person_id):
         """Get the children of a person"""
-        children = []
-        person = self.individuals.get(person_id, {})
-        
-        for family_id in person.get('spouse_in_families', []):
-            family = self.families.get(family_id, {})
-            children.extend(family.get('children', []))
-        
-        return children
+        return list(self.family_graph.get_children(person_id))
     
     def _get_sibling_relationship(self, person_id):
         """Get specific sibling relationship with gender"""
@@ -0,0 +1,365 @@
+import unicodedata
+from bisect import bisect_left, insort
+
+SOUNDEX_CODES = {
+    letter: digit
+    for digit, letters in (('1', 'bfpv'), ('2', 'cgjkqsxz'), ('3', 'dt'), ('4', 'l'), ('5', 'mn'), ('6', 'r'))
+    for letter in letters
+}
+
+class SearchIndex:
+    """Prebuilt name index for ranked person search"""
+
+    def __init__(self, individuals):
+        self.individuals = individuals
+        # One entry per name: (person_id, display name, normalized name), or None once re-indexed.
+        # Slots never move, so a changed person is re-indexed without renumbering the others
+        self.entries = []
+        self.removed_entries = 0
+        # person_id -> display names, to tell whether a changed record needs re-indexing
+        self.person_names = {}
+        self.person_entries = {}
+        self.exact_index = {}
+        # (name, person_id, entry_index) and (word, name, person_id, entry_index), sorted
+        self.sorted_names = []
+        self.sorted_tokens = []
+        self.trigram_postings = {}
+        # Word-level postings used by fuzzy search
+        self.token_postings = {}
+        self.sorted_vocabulary = []
+        self.token_trigrams = {}
+        self.phonetic_tokens = {}
+        self.build()
+
+    def build(self):
+        """Build the name entries and postings for every individual"""
+        self.entries = []
+        self.removed_entries = 0
+        self.person_names = {}
+        self.person_entries = {}
+        self.exact_index = {}
+        self.sorted_names = []
+        self.sorted_tokens = []
+        self.trigram_postings = {}
+        self.token_postings = {}
+        self.sorted_vocabulary = []
+        self.token_trigrams = {}
+        self.phonetic_tokens = {}
+        for person_id in self.individuals:
+            self._add_person(person_id, keep_sorted=False)
+
+        # Sort once rather than inserting in order person by person
+        self.sorted_names.sort()
+        self.sorted_tokens.sort()
+        self.sorted_vocabulary.sort()
+        for entry_indexes in self.exact_index.values():
+            entry_indexes.sort(key=self._entry_key)
+
+    def update_people(self, person_ids):
+        """Re-index the people whose names changed; returns whether any did"""
+        changed = [person_id for person_id in person_ids
+                   if self._display_names(person_id) != self.person_names.get(person_id, ())]
+        for person_id in changed:
+            self._remove_person(person_id)
+            self._add_person(person_id)
+
+        # Compact the emptied slots once they outnumber the live entries
+        if self.removed_entries > len(self.entries) // 2:
+            self.build()
+        return bool(changed)
+
+    def _add_person(self, person_id, keep_sorted=True):
+        """Add an entry and its postings for every name of a person"""
+        if person_id not in self.individuals:
+            return
+        self.person_names[person_id] = self._display_names(person_id)
+        self.person_entries[person_id] = []
+        for full_name in self.person_names[person_id]:
+            entry_index = len(self.entries)
+            normalized = self.normalize(full_name)
+            self.entries.append((person_id, full_name, normalized))
+            self.person_entries[person_id].append(entry_index)
+
+            sorted_items = [(self.sorted_names, (normalized, person_id, entry_index))]
+            sorted_items += [(self.sorted_tokens, (token, normalized, person_id, entry_index))
+                             for token in set(normalized.split())]
+            if keep_sorted:
+                insort(self.exact_index.setdefault(normalized, []), entry_index, key=self._entry_key)
+                for sorted_list, item in sorted_items:
+                    insort(sorted_list, item)
+            else:
+                self.exact_index.setdefault(normalized, []).append(entry_index)
+                for sorted_list, item in sorted_items:
+                    sorted_list.append(item)
+
+            # New slots are always the highest, so appending keeps every posting list ascending
+            for token in set(normalized.split()):
+                if token not in self.token_postings:
+                    self.token_postings[token] = []
+                    self._add_token(token, keep_sorted)
+                self.token_postings[token].append(entry_index)
+            for trigram in self._trigrams(normalized):
+                self.trigram_postings.setdefault(trigram, []).append(entry_index)
+
+    def _remove_person(self, person_id):
+        """Drop the entries and postings of a person's names"""
+        self.person_names.pop(person_id, None)
+        for entry_index in self.person_entries.pop(person_id, []):
+            _, _, normalized = self.entries[entry_index]
+            self._remove_posting(self.exact_index, normalized, entry_index)
+            self._remove_sorted(self.sorted_names, (normalized, person_id, entry_index))
+            for token in set(normalized.split()):
+                self._remove_sorted(self.sorted_tokens, (token, normalized, person_id, entry_index))
+                if self._remove_posting(self.token_postings, token, entry_index):
+                    self._remove_token(token)
+            for trigram in self._trigrams(normalized):
+                self._remove_posting(self.trigram_postings, trigram, entry_index)
+            self.entries[entry_index] = None
+            self.removed_entries += 1
+
+    def _add_token(self, token, keep_sorted=True):
+        """Add a new name word to the fuzzy search vocabulary"""
+        if keep_sorted:
+            insort(self.sorted_vocabulary, token)
+        else:
+            self.sorted_vocabulary.append(token)
+        for trigram in self._trigrams(f"${token}$"):
+            self.token_trigrams.setdefault(trigram, set()).add(token)
+        self.phonetic_tokens.setdefault(self.soundex(token), set()).add(token)
+
+    def _remove_token(self, token):
+        """Drop a name word no entry uses any more from the fuzzy search vocabulary"""
+        self._remove_sorted(self.sorted_vocabulary, token)
+        for trigram in self._trigrams(f"${token}$"):
+            self._remove_posting(self.token_trigrams, trigram, token)
+        self._remove_posting(self.phonetic_tokens, self.soundex(token), token)
+
+    def _remove_posting(self, postings, key, value):
+        """Remove a value from the postings of a key; returns whether the key is now gone"""
+        postings[key].remove(value)
+        if postings[key]:
+            return False
+        del postings[key]
+        return True
+
+    def _remove_sorted(self, sorted_list, item):
+        """Remove an item from a sorted list"""
+        del sorted_list[bisect_left(sorted_list, item)]
+
+    def _entry_key(self, entry_index):
+        """Sort key of an entry; every tier returns its results in this order"""
+        person_id, _, normalized = self.entries[entry_index]
+        return normalized, person_id
+
+    def _display_names(self, person_id):
+        """The non-empty full names of a person"""
+        names = []
+        for name_info in self.individuals.get(person_id, {}).get('names', []):
+            full_name = f"{name_info.get('given', '')} {name_info.get('surname', '')}".strip()
+            if full_name:
+                names.append(full_name)
+        return tuple(names)
+
+    def normalize(self, text):
+        """Lowercase, strip accents and collapse whitespace"""
+        decomposed = unicodedata.normalize('NFKD', text)
+        stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        return ' '.join(stripped.lower().split())
+
+    def soundex(self, token):
+        """Soundex key of a single word"""
+        letters = [char for char in token if char.isalpha()]
+        if not letters:
+            return ''
+
+        code = letters[0]
+        last_digit = SOUNDEX_CODES.get(letters[0], '')
+        for letter in letters[1:]:
+            digit = SOUNDEX_CODES.get(letter, '')
+            if digit and digit != last_digit:
+                code += digit
+            # H and W don't separate letters with the same code
+            if letter not in 'hw':
+                last_digit = digit
+        return (code + '000')[:4]
+
+    def search(self, query, limit=20, mode='exact'):
+        """Return up to limit (person_id, name) matches, best matches first, one per person"""
+        normalized = self.normalize(query)
+        if not normalized:
+            return []
+
+        if mode == 'fuzzy':
+            return self.fuzzy_search(normalized, limit)
+
+        results = []
+        seen_people = set()
+
+        # Ranked tiers: exact name, name prefix, every word a prefix, substring anywhere
+        tiers = (
+            self._exact_matches,
+            self._name_prefix_matches,
+            self._token_prefix_matches,
+            self._substring_matches
+        )
+        for tier in tiers:
+            for entry_index in tier(normalized):
+                person_id, full_name, _ = self.entries[entry_index]
+                if person_id in seen_people:
+                    continue
+                seen_people.add(person_id)
+                results.append((person_id, full_name))
+                # Stop as soon as we have enough results
+                if len(results) >= limit:
+                    return results
+
+        return results
+
+    def fuzzy_search(self, query, limit=20):
+        """Match names that sound alike or are within a small edit distance of the query"""
+        normalized = self.normalize(query)
+        query_tokens = normalized.split()
+        if not query_tokens:
+            return []
+
+        # Best score of each name word for each query word; lower is closer
+        token_scores = [self._fuzzy_token_matches(query_token) for query_token in query_tokens]
+        if not all(token_scores):
+            return []
+
+        # Candidate entries come from the postings of the first word's matches
+        candidates = {}
+        for token, score in token_scores[0].items():
+            for entry_index in self.token_postings[token]:
+                if score < candidates.get(entry_index, score + 1):
+                    candidates[entry_index] = score
+
+        scored = []
+        for entry_index, score in candidates.items():
+            name_tokens = self.entries[entry_index][2].split()
+            for scores in token_scores[1:]:
+                best = min((scores[token] for token in name_tokens if token in scores), default=None)
+                if best is None:
+                    break
+                score += best
+            else:
+                scored.append((score, entry_index))
+
+        results = []
+        seen_people = set()
+        for _, entry_index in sorted(scored, key=lambda item: (item[0], self._entry_key(item[1]))):
+            person_id, full_name, _ = self.entries[entry_index]
+            if person_id in seen_people:
+                continue
+            seen_people.add(person_id)
+            results.append((person_id, full_name))
+            if len(results) >= limit:
+                break
+
+        return results
+
+    def _fuzzy_token_matches(self, query_token):
+        """Map name words close to a query word to a score (0 exact, 1 prefix or one edit, 2 otherwise)"""
+        max_distance = 1 if len(query_token) <= 4 else 2
+        matches = {}
+
+        if query_token in self.token_postings:
+            matches[query_token] = 0
+
+        for token in self._prefix_keys(self.sorted_vocabulary, query_token):
+            matches.setdefault(token, 1)
+
+        # Spelling variants share trigrams, sound-alikes share a Soundex key
+        candidates = set(self.phonetic_tokens.get(self.soundex(query_token), ()))
+        for trigram in self._trigrams(f"${query_token}$"):
+            candidates.update(self.token_trigrams.get(trigram, ()))
+
+        for token in candidates:
+            if token in matches:
+                continue
+            distance = self._edit_distance(query_token, token, max_distance)
+            if distance <= max_distance:
+                matches[token] = min(distance, 2)
+            elif self.soundex(token) == self.soundex(query_token):
+                matches[token] = 2
+
+        return matches
+
+    def _edit_distance(self, first, second, max_distance):
+        """Levenshtein distance, giving up once it exceeds max_distance"""
+        if abs(len(first) - len(second)) > max_distance:
+            return max_distance + 1
+
+        previous = list(range(len(second) + 1))
+        for i, first_char in enumerate(first, 1):
+            current = [i]
+            for j, second_char in enumerate(second, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1,
+                                   previous[j - 1] + (first_char != second_char)))
+            if min(current) > max_distance:
+                return max_distance + 1
+            previous = current
+        return previous[-1]
+
+    def _exact_matches(self, normalized):
+        """Entries whose whole name equals the query"""
+        return self.exact_index.get(normalized, [])
+
+    def _name_prefix_matches(self, normalized):
+        """Entries whose name starts with the query"""
+        return (item[-1] for item in self._prefix_range(self.sorted_names, normalized))
+
+    def _token_prefix_matches(self, normalized):
+        """Entries where every query word is the prefix of a word in the name"""
+        query_tokens = normalized.split()
+        for *_, entry_index in self._prefix_range(self.sorted_tokens, query_tokens[0]):
+            name_tokens = self.entries[entry_index][2].split()
+            if all(any(token.startswith(query_token) for token in name_tokens)
+                   for query_token in query_tokens[1:]):
+                yield entry_index
+
+    def _substring_matches(self, normalized):
+        """Entries containing the query anywhere, found through trigram postings"""
+        trigrams = self._trigrams(normalized)
+        if not trigrams:
+            yield from self._short_substring_matches(normalized)
+            return
+
+        # Intersect the shortest posting lists first
+        postings = sorted((self.trigram_postings.get(trigram, []) for trigram in trigrams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return
+
+        for entry_index in sorted(candidates, key=self._entry_key):
+            if normalized in self.entries[entry_index][2]:
+                yield entry_index
+
+    def _short_substring_matches(self, normalized):
+        """Entries containing a query too short for trigrams, found through the words that contain it"""
+        # Such a query has no space, so it lies within a single word of the name
+        candidates = set()
+        for token in self.sorted_vocabulary:
+            if normalized in token:
+                candidates.update(self.token_postings[token])
+        return sorted(candidates, key=self._entry_key)
+
+    def _prefix_range(self, sorted_items, prefix):
+        """Iterate the sorted (key, ..., entry_index) items whose key starts with prefix"""
+        position = bisect_left(sorted_items, (prefix,))
+        while position < len(sorted_items) and sorted_items[position][0].startswith(prefix):
+            yield sorted_items[position]
+            position += 1
+
+    def _prefix_keys(self, sorted_keys, prefix):
+        """Iterate the sorted keys that start with prefix"""
+        position = bisect_left(sorted_keys, prefix)
+        while position < len(sorted_keys) and sorted_keys[position].startswith(prefix):
+            yield sorted_keys[position]
+            position += 1
+
+    def _trigrams(self, text):
+        """Set of 3-character substrings of a normalized name"""
+        return {text[i:i + 3] for i in range(len(text) - 2)}
@@ -0,0 +1,120 @@
+class StatsCalculator:
+    """Tree-wide statistics computed once per data load instead of on every /stats request"""
+
+    def __init__(self, individuals, families, generation_calc):
+        self.individuals = individuals
+        self.families = families
+        self.generation_calc = generation_calc
+        self.stats = {}
+        # person_id -> (birth year, surnames, birthplace country) counted for that person
+        self.person_values = {}
+        self.person_generations = {}
+        self.birth_year_count = {}
+        self.surname_count = {}
+        self.decade_count = {}
+        self.country_count = {}
+        self.generation_count = {}
+        self.refresh()
+
+    def refresh(self):
+        """Recompute every aggregate from scratch"""
+        self.person_values = {}
+        self.person_generations = {}
+        self.birth_year_count = {}
+        self.surname_count = {}
+        self.decade_count = {}
+        self.country_count = {}
+        self.generation_count = {}
+        for person_id in self.individuals:
+            self._count_person(person_id)
+        return self._build_stats()
+
+    def update_people(self, person_ids, generations_changed=False):
+        """Apply re-synced records to the aggregates by taking out their old values and adding the new ones"""
+        for person_id in person_ids:
+            self._uncount_person(person_id)
+            self._count_person(person_id)
+
+        # A recomputed generation table can move anyone; only the labels that differ are recounted
+        if generations_changed:
+            for person_id, old_generation in self.person_generations.items():
+                generation = self.generation_calc.get_generation_label(person_id)
+                if generation != old_generation:
+                    self._add(self.generation_count, old_generation, -1)
+                    self._add(self.generation_count, generation, 1)
+                    self.person_generations[person_id] = generation
+        return self._build_stats()
+
+    def _count_person(self, person_id):
+        """Add a person's values to the counts"""
+        person = self.individuals.get(person_id)
+        if person is None:
+            return
+        birth_year = person.get('birth_year')
+        surnames = tuple(surname for surname in (name_info.get('surname', '').strip()
+                                                 for name_info in person.get('names', [])) if surname)
+        country = self._birthplace_country(person.get('birth_place'))
+        self.person_values[person_id] = (birth_year, surnames, country)
+        self.person_generations[person_id] = self.generation_calc.get_generation_label(person_id)
+        self._add_values(person_id, 1)
+
+    def _uncount_person(self, person_id):
+        """Take a person's counted values back out of the counts"""
+        if person_id in self.person_values:
+            self._add_values(person_id, -1)
+            del self.person_values[person_id]
+            del self.person_generations[person_id]
+
+    def _add_values(self, person_id, step):
+        """Add (step 1) or remove (step -1) the counted values of a person"""
+        birth_year, surnames, country = self.person_values[person_id]
+        if birth_year:
+            self._add(self.birth_year_count, birth_year, step)
+            self._add(self.decade_count, f"{birth_year // 10 * 10}s", step)
+        for surname in surnames:
+            self._add(self.surname_count, surname, step)
+        if country:
+            self._add(self.country_count, country, step)
+        self._add(self.generation_count, self.person_generations[person_id], step)
+
+    def _add(self, counts, key, step):
+        """Change a count, dropping keys that reach zero"""
+        counts[key] = counts.get(key, 0) + step
+        if not counts[key]:
+            del counts[key]
+
+    def _build_stats(self):
+        """Assemble the /stats response from the counts"""
+        date_range = None
+        if self.birth_year_count:
+            date_range = {
+                'earliest': min(self.birth_year_count),
+                'latest': max(self.birth_year_count)
+            }
+
+        # Equal counts are ordered by name so a re-synced tree reports the same order as a fresh load
+        by_count = lambda x: (-x[1], x[0])
+        self.stats = {
+            'total_individuals': len(self.individuals),
+            'total_families': len(self.families),
+            'date_range': date_range,
+            # Top 10 surnames
+            'most_common_surnames': sorted(self.surname_count.items(), key=by_count)[:10],
+            # (label, count) pairs, since JSON objects would lose the order
+            'generation_counts': sorted(self.generation_count.items(), key=lambda x: self._generation_sort_key(x[0])),
+            'birth_decade_counts': sorted(self.decade_count.items()),
+            'birthplace_country_counts': sorted(self.country_count.items(), key=by_count)
+        }
+        return self.stats
+
+    def _birthplace_country(self, birth_place):
+        """Country of a GEDCOM place ("Town,County,Region,Country"), the last non-empty part"""
+        if not birth_place:
+            return None
+        parts = [part.strip() for part in birth_place.split(',') if part.strip()]
+        return parts[-1] if parts else None
+
+    def _generation_sort_key(self, label):
+        """Sort G1, G2, ... G10 numerically with G? last"""
+        number = label[1:]
+        return (0, int(number)) if number.lstrip('-').isdigit() else (1, 0)
@@ -0,0 +1,35 @@
+import os
+import tempfile
+from gedcom_parser import GedcomParser
+
+def gedcom_lines(char, given):
+    return [
+        '0 HEAD',
+        f'1 CHAR {char}',
+        '0 @I1@ INDI',
+        f'1 NAME {given} /Mensah/',
+        '1 SEX F',
+        '0 TRLR'
+    ]
+
+# (description, CHAR header, given name, bytes written to disk)
+cases = [
+    ('UTF-8 with BOM', 'UTF-8', 'Agŋele', lambda text: b'\xef\xbb\xbf' + text.encode('utf-8')),
+    ('UTF-16 with BOM', 'UNICODE', 'Agŋele', lambda text: text.encode('utf-16')),
+    ('UNICODE label on a UTF-8 file', 'UNICODE', 'Agŋele', lambda text: text.encode('utf-8')),
+    ('ASCII label on a UTF-8 file', 'ASCII', 'Agŋele', lambda text: text.encode('utf-8')),
+    ('ANSI label on a cp1252 file', 'ANSI', 'Müller', lambda text: text.encode('cp1252'))
+]
+
+with tempfile.TemporaryDirectory() as directory:
+    for description, char, given, encode in cases:
+        path = os.path.join(directory, 'test.ged')
+        with open(path, 'wb') as file:
+            file.write(encode('\n'.join(gedcom_lines(char, given)) + '\n'))
+
+        data = GedcomParser().parse_file(path)
+        result = data['individuals']['I1']['names'][0]['given']
+        assert result == given, f'{description}: expected {given!r}, got {result!r}'
+        print(f'{description}: {result}')
+
+print('Encoding test completed successfully!')
@@ -0,0 +1,52 @@
+from gedcom_parser import GedcomParser
+from relationship_calculator import RelationshipCalculator
+from relatedness_calculator import RelatednessCalculator
+
+parser = GedcomParser()
+data = parser.parse_file('Weku-2025.ged')
+calc = RelationshipCalculator(data)
+kinship = calc.kinship_calc
+
+# Labels for (generations up from person1, generations up from person2)
+expected_labels = {
+    (0, 1): 'Son',
+    (2, 0): 'Grandfather',
+    (1, 1): 'Brother',
+    (4, 1): 'Great-Great-Uncle',
+    (1, 3): 'Great-Nephew',
+    (2, 2): 'First Cousin',
+    (3, 4): 'Second Cousin Once Removed',
+    (2, 5): 'First Cousin Thrice Removed',
+    (12, 12): '11th Cousin',
+    (13, 14): '12th Cousin Once Removed',
+    (22, 22): '21st Cousin',
+    (23, 23): '22nd Cousin',
+    (24, 24): '23rd Cousin',
+    (112, 112): '111th Cousin'
+}
+for (depth1, depth2), label in expected_labels.items():
+    result = kinship.label_for_depths(depth1, depth2, 'M')
+    assert result == label, f'{depth1}/{depth2}: expected {label}, got {result}'
+print('Kinship labels match expected values')
+
+# Show how the main reference person relates to a few people
+reference_id = 'I71243996'
+relationships = calc.get_relationships_from(reference_id)
+print(f'Labelled {len(relationships)} individuals relative to {reference_id}')
+
+count = 0
+for person_id, label in relationships.items():
+    if 'Cousin' in label or 'Great' in label:
+        print(f'{person_id}: {label}')
+        count += 1
+        if count >= 5:
+            break
+
+# Expected shared DNA follows from the kinship coefficient
+relatedness = RelatednessCalculator(data['individuals'], calc.family_graph)
+shared_dna = relatedness.get_relatedness(reference_id)
+for person_id in calc.family_graph.get_parents(reference_id) + calc.family_graph.get_children(reference_id):
+    assert shared_dna[person_id] == 50.0, f'{person_id}: expected 50.0, got {shared_dna[person_id]}'
+print(f'{len(shared_dna)} individuals share DNA with {reference_id}')
+
+print('Relationship test completed successfully!')
@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+from gedcom_parser import GedcomParser
+from family_graph import FamilyGraph
+from relationship_calculator import RelationshipCalculator
+from generation_calculator import GenerationCalculator
+from relatedness_calculator import RelatednessCalculator
+from search_index import SearchIndex
+from stats_calculator import StatsCalculator
+
+reference_id = 'I71243996'
+added_id = 'I900000001'
+
+def read_records(path):
+    """Split a GEDCOM file into records of lines, keeping its line ending"""
+    with open(path, encoding='utf-8-sig', newline='') as file:
+        text = file.read()
+    newline = '\r\n' if '\r\n' in text else '\r' if '\r' in text else '\n'
+    records = []
+    for line in text.split(newline):
+        if line.startswith('0 ') or not records:
+            records.append([])
+        records[-1].append(line)
+    return records, newline
+
+def write_records(path, records, newline):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(newline.join(line for record in records for line in record))
+
+def find_record(records, xref):
+    return next(record for record in records if record[0].startswith(f'0 @{xref}@ '))
+
+def build(data):
+    """The graph, relationship, generation, relatedness, search and stats structures the app derives from parsed data"""
+    graph = FamilyGraph(data)
+    relationships = RelationshipCalculator(data, graph)
+    generations = GenerationCalculator(data['individuals'], data['families'], precompute=True, family_graph=graph)
+    relatedness = RelatednessCalculator(data['individuals'], graph)
+    stats = StatsCalculator(data['individuals'], data['families'], generations)
+    return graph, relationships, generations, relatedness, SearchIndex(data['individuals']), stats
+
+def warm_caches(relationships, relatedness, person_ids):
+    """Fill the caches a re-sync has to update or invalidate"""
+    relationships.get_relationships_from(reference_id)
+    for person_id in person_ids:
+        relatedness.get_kinship_row(person_id)
+        relationships.get_ancestor_depths(person_id, 4)
+        relationships.get_descendant_depths(person_id, 4)
+
+def resync(parser, path, data, structures):
+    """Apply a new version of the file the way the app does on a re-sync"""
+    graph, relationships, generations, relatedness, search, stats = structures
+    changes = parser.resync_file(path)
+    data['record_versions'] = parser.record_versions
+    relinked_people = graph.update_people(changes['linked_people'])
+    relatedness.update_people(changes['individuals'], relinked_people)
+    if relinked_people:
+        relationships.kinship_calc.invalidate(relinked_people)
+        relationships.invalidate_lineage(relinked_people)
+        generations.precompute_generations()
+        relationships.clear_relationship_cache()
+    else:
+        generations.refresh_people(changes['individuals'])
+        relationships.refresh_people(changes['individuals'])
+    search.update_people(changes['individuals'])
+    if changes['individuals'] or changes['families']:
+        stats.update_people(changes['individuals'], generations_changed=bool(relinked_people))
+    print(f"Re-synced {len(changes['individuals'])} individuals and {len(changes['families'])} families")
+    return changes, relinked_people
+
+def assert_matches_fresh(path, data, structures, moved_id):
+    """Compare the re-synced data and structures with a fresh parse of the file"""
+    graph, relationships, generations, relatedness, search, stats = structures
+    fresh_data = GedcomParser().parse_file(path)
+    fresh_graph, fresh_relationships, fresh_generations, fresh_relatedness, fresh_search, fresh_stats = build(fresh_data)
+
+    for key in ('individuals', 'families', 'notes', 'record_versions'):
+        assert data[key] == fresh_data[key], f'{key} differ from a fresh parse'
+    print(f"Records match a fresh parse of {len(data['individuals'])} individuals")
+
+    # Removed people keep an empty node until the arrays are repacked
+    assert set(graph.person_ids) >= set(fresh_graph.person_ids), 'graph nodes are missing'
+    for person_id in fresh_data['individuals']:
+        for edges in ('get_parents', 'get_children', 'get_spouses', 'get_siblings', 'get_connected'):
+            result = getattr(graph, edges)(person_id)
+            expected = getattr(fresh_graph, edges)(person_id)
+            assert result == expected, f'{person_id} {edges}: expected {expected}, got {result}'
+    for person_id in (reference_id, added_id):
+        for lineage in ('get_ancestor_depths', 'get_descendant_depths'):
+            result = getattr(relationships, lineage)(person_id, 4)
+            expected = getattr(fresh_relationships, lineage)(person_id, 4)
+            assert result == expected, f'{person_id} {lineage} differs from a fresh build'
+    print('Family graph matches a fresh build')
+
+    assert relationships.kinship_calc.ancestor_depths == fresh_relationships.kinship_calc.ancestor_depths, \
+        'kinship maps differ from a fresh build'
+    assert relationships.get_relationships_from(reference_id) == fresh_relationships.get_relationships_from(reference_id), \
+        'relationship labels differ from a fresh build'
+    print('Kinship maps and relationship labels match a fresh build')
+
+    assert generations.generation_cache == fresh_generations.generation_cache, 'generations differ from a fresh build'
+    assert generations.generation_labels == fresh_generations.generation_labels, 'generation labels differ'
+    print('Generation table matches a fresh build')
+
+    # The order may differ from a fresh build, but parents must still come first
+    assert set(relatedness.order_index) == set(data['individuals']), 'kinship order misses people'
+    for person_id, parents in relatedness.birth_parents.items():
+        assert parents == fresh_relatedness.birth_parents[person_id], f'{person_id} birth parents differ'
+        for parent_id in parents:
+            assert relatedness.order_index[parent_id] < relatedness.order_index[person_id], f'{person_id} before a parent'
+    for person_id in (reference_id, moved_id, added_id):
+        assert relatedness.get_kinship_row(person_id) == fresh_relatedness.get_kinship_row(person_id), \
+            f'{person_id} kinship row differs from a fresh build'
+    print('Kinship coefficients match a fresh build')
+
+    for query in ('renamed', 'added', 'adjei', 'ei', 'kwame'):
+        for mode in ('exact', 'fuzzy'):
+            result = search.search(query, limit=len(data['individuals']), mode=mode)
+            expected = fresh_search.search(query, limit=len(data['individuals']), mode=mode)
+            assert result == expected, f'{mode} search for {query!r} differs from a fresh index'
+    print('Search index matches a fresh build')
+
+    assert stats.stats == fresh_stats.stats, 'stats differ from a fresh build'
+    print('Stats match a fresh build')
+    return fresh_data
+
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, 'test.ged')
+    shutil.copy('Weku-2025.ged', path)
+
+    parser = GedcomParser()
+    data = parser.parse_file(path)
+    structures = build(data)
+    graph, relationships, generations, relatedness, search, stats = structures
+    individuals, families = data['individuals'], data['families']
+
+    # Pick a child with one family and children of their own to move, a family with both parents in
+    # another generation to move them to (not one of their own descendants), and a leaf person to remove
+    moved_id = next(person_id for person_id, person in individuals.items()
+                    if len(person.get('child_of_families', [])) == 1 and graph.get_children(person_id)
+                    and person_id != reference_id)
+    old_family_id = individuals[moved_id]['child_of_families'][0]
+    new_family_id = next(family_id for family_id, family in families.items()
+                         if family_id != old_family_id and family.get('husband') and family.get('wife')
+                         and generations.calculate_generation(family['husband']) + 1 != generations.calculate_generation(moved_id)
+                         and moved_id not in relationships.kinship_calc.ancestor_depths[family['husband']]
+                         and moved_id not in relationships.kinship_calc.ancestor_depths[family['wife']])
+    removed_id = next(person_id for person_id, person in individuals.items()
+                      if len(person.get('child_of_families', [])) == 1 and not person.get('spouse_in_families')
+                      and person_id not in (reference_id, moved_id))
+    removed_family_id = individuals[removed_id]['child_of_families'][0]
+    renamed_id = next(person_id for person_id, person in individuals.items()
+                      if person.get('names') and person_id not in (moved_id, removed_id))
+
+    records, newline = read_records(path)
+
+    # Rename a person
+    renamed = find_record(records, renamed_id)
+    name_line = next(index for index, line in enumerate(renamed) if line.startswith('1 NAME '))
+    renamed[name_line] = '1 NAME Renamed /Person/'
+    renamed[:] = [line for line in renamed if not line.startswith(('2 GIVN ', '2 SURN '))]
+
+    # Move a child between families
+    moved = find_record(records, moved_id)
+    moved[:] = [line.replace(f'@{old_family_id}@', f'@{new_family_id}@') if line.startswith('1 FAMC ') else line
+                for line in moved]
+    old_family = find_record(records, old_family_id)
+    old_family.remove(f'1 CHIL @{moved_id}@')
+    find_record(records, new_family_id).insert(1, f'1 CHIL @{moved_id}@')
+
+    # Add an INDI as another child of that family
+    find_record(records, new_family_id).insert(1, f'1 CHIL @{added_id}@')
+    records.insert(-1, [f'0 @{added_id}@ INDI', '1 NAME Added /Person/', '1 SEX F',
+                        '1 BIRT', '2 DATE 1 JAN 1990', f'1 FAMC @{new_family_id}@'])
+
+    # Remove an INDI along with the link to it
+    records.remove(find_record(records, removed_id))
+    find_record(records, removed_family_id).remove(f'1 CHIL @{removed_id}@')
+
+    warm_caches(relationships, relatedness, (reference_id, moved_id, added_id))
+    write_records(path, records, newline)
+    changes, relinked_people = resync(parser, path, data, structures)
+    for person_id in (renamed_id, moved_id, added_id, removed_id):
+        assert person_id in changes['individuals'], f'{person_id} missing from the changed individuals'
+    assert relinked_people, 'moving a child did not change any family links'
+
+    fresh_data = assert_matches_fresh(path, data, structures, moved_id)
+    assert individuals[renamed_id]['names'][0]['given'] == 'Renamed'
+    assert removed_id not in individuals
+    assert graph.get_parents(moved_id) == [families[new_family_id]['husband'], families[new_family_id]['wife']]
+
+    # Edits that leave the family links alone relabel the cached maps in place
+    warm_caches(relationships, relatedness, (reference_id, moved_id, added_id))
+    # A child's label (Son/Daughter) follows their sex
+    child_id = next(person_id for person_id in graph.get_children(reference_id) if person_id != moved_id)
+    records, newline = read_records(path)
+    child = find_record(records, child_id)
+    sex_line = next(index for index, line in enumerate(child) if line.startswith('1 SEX '))
+    child[sex_line] = '1 SEX F' if child[sex_line] == '1 SEX M' else '1 SEX M'
+    added = find_record(records, added_id)
+    added[added.index('1 NAME Added /Person/')] = '1 NAME Added Again /Person/'
+    # Edit a family of a person whose families are not in ID order; they must keep file order
+    spouse_id = next(person_id for person_id, person in individuals.items()
+                     if person.get('families_as_spouse', []) != sorted(person.get('families_as_spouse', [])))
+    edited_family_id = individuals[spouse_id]['families_as_spouse'][-1]
+    find_record(records, edited_family_id)[1:1] = ['1 MARR', '2 DATE 1 JAN 1950']
+    write_records(path, records, newline)
+
+    changes, relinked_people = resync(parser, path, data, structures)
+    assert changes['individuals'] == {child_id, added_id}, f"unexpected changes {changes['individuals']}"
+    assert changes['families'] == {edited_family_id}, f"unexpected changes {changes['families']}"
+    assert spouse_id in changes['linked_people'], f'{spouse_id} families were not recomputed'
+    assert not relinked_people, 'a sex or name change changed family links'
+    fresh_data = assert_matches_fresh(path, data, structures, moved_id)
+
+    # The snapshot written by the re-sync loads the same data on the next start
+    snapshot_data = GedcomParser().parse_file_cached(path)
+    for key in ('individuals', 'families', 'notes'):
+        assert snapshot_data[key] == fresh_data[key], f'snapshot {key} differ from a fresh parse'
+    print('Re-sync snapshot matches a fresh parse')
+
+print('Re-sync test completed successfully!')
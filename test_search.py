@@ -0,0 +1,24 @@
+from gedcom_parser import GedcomParser
+from search_index import SearchIndex
+
+parser = GedcomParser()
+data = parser.parse_file('Weku-2025.ged')
+index = SearchIndex(data['individuals'])
+
+def people_containing(query):
+    """People with a name containing the query, found by scanning every name"""
+    return {person_id for person_id, names in index.person_names.items()
+            if any(query in index.normalize(name) for name in names)}
+
+# Substring search finds the same people as a full scan, including queries too short for trigrams
+for query in ('ei', 'ad', 'a', 'jei', 'adjei'):
+    expected = people_containing(query)
+    result = {person_id for person_id, _ in index.search(query, limit=len(data['individuals']))}
+    assert result == expected, f'{query!r}: expected {len(expected)} people, got {len(result)}'
+    print(f'{query!r}: {len(result)} people')
+
+# The count the linear scan that the index replaced returned for "ei"
+result = index.search('ei', limit=len(data['individuals']))
+assert len(result) == 155, f"'ei': expected 155 people, got {len(result)}"
+
+print('Search test completed successfully!')